@@ -9,12 +9,16 @@ from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
+import atexit
 import logging
 import os
+import queue
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 import re
 from email_validator import validate_email, EmailNotValidError
  
@@ -25,20 +29,29 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Hand log records to a background thread so request handlers never block on handler I/O
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_root_logger = logging.getLogger()
+log_listener = QueueListener(_log_queue, *_root_logger.handlers, respect_handler_level=True)
+_root_logger.handlers = [QueueHandler(_log_queue)]
+log_listener.start()
+atexit.register(log_listener.stop)
+
 # Import application modules
 from agent.main import InfraAgent
 from security.auth import (
-    authenticate_user, get_current_user, create_access_token,
-    hash_password, authenticate_user as auth_user_db
+    AuthenticatedUser, authenticate_user, get_current_user, create_access_token,
+    hash_password_async, authenticate_user as auth_user_db, last_login_writer
 )
 from security.password_validator import validate_password_strength
 from security.credentials import (
     store_user_credentials, get_user_credentials,
-    list_user_credentials, delete_user_credentials
+    list_user_credentials, delete_user_credentials,
+    last_used_writer as credential_last_used_writer
 )
 from security.rbac import Permission, check_permission
 from database.models import User, InfraRequest, AuditLog, CloudProvider
-from database.session import get_db, init_db
+from database.session import get_db, get_async_db, init_db
 
 # Initialize rate limiter
 limiter = Limiter(key_func=get_remote_address)
@@ -158,6 +171,14 @@ async def startup_event():
         # Exit the application if database is not available
         raise RuntimeError("Cannot start application without database connection") from e
 
+# Shutdown event
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush deferred writes before exiting"""
+    logger.info("Shutting down Infrastructure Provisioning Agent...")
+    await last_login_writer.stop()
+    await credential_last_used_writer.stop()
+
 # Health check
 @app.get("/health")
 async def health_check():
@@ -171,13 +192,13 @@ async def health_check():
 # Authentication endpoints
 @app.post("/auth/login", response_model=LoginResponse)
 @limiter.limit("5/minute")  # Max 5 login attempts per minute
-async def login(request: Request, login_data: LoginRequest, db: Session = Depends(get_db)):
+async def login(request: Request, login_data: LoginRequest, db: AsyncSession = Depends(get_async_db)):
     """
     User login endpoint
     Returns JWT access token
     """
     try:
-        user = auth_user_db(db, login_data.username, login_data.password)
+        user = await auth_user_db(db, login_data.username, login_data.password)
 
         if not user:
             raise HTTPException(
@@ -196,7 +217,7 @@ async def login(request: Request, login_data: LoginRequest, db: Session = Depend
             timestamp=datetime.utcnow()
         )
         db.add(audit_log)
-        db.commit()
+        await db.commit()
 
         return LoginResponse(
             access_token=access_token,
@@ -258,7 +279,7 @@ async def register(
         user = User(
             username=username,
             email=email,
-            password_hash=hash_password(password),
+            password_hash=await hash_password_async(password),
             full_name=full_name,
             role=UserRole.USER,
             is_active=True
@@ -283,7 +304,7 @@ async def register(
 @app.post("/chat", response_model=ChatResponse)
 async def chat(
     request: ChatRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -322,7 +343,7 @@ async def chat(
 @app.post("/confirm-action")
 async def confirm_action(
     request: ConfirmActionRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -359,7 +380,7 @@ async def confirm_action(
 @app.post("/credentials/store")
 async def store_credentials(
     request: CredentialRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Store cloud provider credentials"""
@@ -388,7 +409,7 @@ async def store_credentials(
 
 @app.get("/credentials/list")
 async def list_credentials(
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """List user's stored credentials"""
@@ -405,7 +426,7 @@ async def list_credentials(
 # Resource management endpoints
 @app.get("/resources")
 async def list_resources(
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """List user's infrastructure resources"""
@@ -441,7 +462,7 @@ async def list_resources(
 # Admin endpoints
 @app.get("/admin/users")
 async def list_users(
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """List all users (admin only)"""
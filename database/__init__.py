@@ -3,7 +3,8 @@ Database package initialization
 """
 from .models import Base, User, Credential, InfraRequest, AuditLog, ResourceInventory
 from .models import UserRole, RequestStatus, ActionType, CloudProvider
-from .session import get_db, init_db, SessionLocal, engine
+from .session import get_db, get_async_db, init_db, SessionLocal, AsyncSessionLocal, engine, async_engine
+from .session import DeferredTimestampWriter
 
 __all__ = [
     'Base',
@@ -17,7 +18,11 @@ __all__ = [
     'ActionType',
     'CloudProvider',
     'get_db',
+    'get_async_db',
     'init_db',
     'SessionLocal',
-    'engine'
+    'AsyncSessionLocal',
+    'engine',
+    'async_engine',
+    'DeferredTimestampWriter'
 ]
@@ -2,7 +2,7 @@
 Database Models for Infrastructure Provisioning Agent
 SQLAlchemy ORM models for users, credentials, requests, and audit logs
 """
-from sqlalchemy import Column, String, Integer, DateTime, Text, Float, Boolean, ForeignKey, JSON, Enum as SQLEnum
+from sqlalchemy import Column, String, Integer, DateTime, Text, Float, Boolean, ForeignKey, JSON, Index, Enum as SQLEnum
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -12,10 +12,16 @@ import uuid
 Base = declarative_base()
 
 class UserRole(enum.Enum):
-    """User roles for RBAC"""
-    ADMIN = "admin"
-    USER = "user"
-    VIEWER = "viewer"
+    """User roles for RBAC, each with an integer privilege level for ordering"""
+    ADMIN = ("admin", 3)
+    USER = ("user", 2)
+    VIEWER = ("viewer", 1)
+
+    def __new__(cls, value: str, level: int):
+        member = object.__new__(cls)
+        member._value_ = value
+        member.level = level
+        return member
 
 class RequestStatus(enum.Enum):
     """Infrastructure request status"""
@@ -54,6 +60,9 @@ class User(Base):
     role = Column(SQLEnum(UserRole), default=UserRole.USER, nullable=False)
     is_active = Column(Boolean, default=True, nullable=False)
 
+    # Default credential per provider: {provider value: credential_id}
+    default_credentials = Column(JSON, default=dict)
+
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -78,10 +87,12 @@ class Credential(Base):
     provider = Column(SQLEnum(CloudProvider), nullable=False)
     region = Column(String(50))
 
-    # Encrypted credentials (Fernet encrypted JSON)
+    # Encrypted credentials (AES-256-GCM encrypted JSON; older rows may be Fernet)
     encrypted_data = Column(Text, nullable=False)
 
     # Metadata
+    # Authoritative defaults live in User.default_credentials; this flag only
+    # reflects how the row was stored and is consulted for users without a mapping
     is_default = Column(Boolean, default=False)
     is_active = Column(Boolean, default=True)
 
@@ -93,6 +104,11 @@ class Credential(Base):
     # Relationships
     user = relationship("User", back_populates="credentials")
 
+    __table_args__ = (
+        # Covers the default-credential lookup: filter on the first three, order by the last two
+        Index("ix_credentials_lookup", "user_id", "provider", "is_active", "is_default", "created_at"),
+    )
+
     def __repr__(self):
         return f"<Credential(id={self.id}, user_id={self.user_id}, provider={self.provider.value})>"
 
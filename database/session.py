@@ -1,11 +1,14 @@
 """
 Database session management
 """
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text, update
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker, Session
 from .models import Base
+import asyncio
 import os
-from typing import Generator
+from datetime import datetime
+from typing import AsyncGenerator, Dict, Generator, Optional
 import logging
 
 # Get database URL from environment
@@ -26,10 +29,77 @@ engine = create_engine(
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Sync driver URL prefixes and their asyncio equivalents
+_ASYNC_DRIVERS = (
+    ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+    ("postgresql://", "postgresql+asyncpg://"),
+    ("sqlite://", "sqlite+aiosqlite://"),
+)
+
+def _to_async_url(url: str) -> str:
+    """Map a sync database URL onto its asyncio driver"""
+    for sync_prefix, async_prefix in _ASYNC_DRIVERS:
+        if url.startswith(sync_prefix):
+            return async_prefix + url[len(sync_prefix):]
+    return url
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _to_async_url(DATABASE_URL))
+
+# Async engine for request paths that run on the event loop (auth, audit)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_pre_ping=True,
+    pool_size=10,
+    max_overflow=20,
+    echo=os.getenv("SQL_ECHO", "false").lower() == "true"
+)
+
+# Objects stay usable after commit; async sessions cannot lazy-load expired attributes
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+def _add_missing_schema(connection) -> None:
+    """
+    Bring tables that already exist up to date with the models
+
+    create_all only creates missing tables, so columns and indexes added to an
+    existing model (e.g. users.default_credentials, ix_credentials_lookup) are
+    added here. Only additive, nullable changes are applied; anything else needs
+    a manual migration and is logged instead.
+    """
+    inspector = inspect(connection)
+    existing_tables = set(inspector.get_table_names())
+    preparer = connection.dialect.identifier_preparer
+
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+
+        existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing_columns:
+                continue
+            if not column.nullable:
+                logging.error(f"Column {table.name}.{column.name} is missing and NOT NULL; add it with a manual migration")
+                continue
+
+            column_type = column.type.compile(dialect=connection.dialect)
+            connection.execute(text(
+                f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {preparer.format_column(column)} {column_type}"
+            ))
+            logging.info(f"Added missing column {table.name}.{column.name}")
+
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(connection)
+                logging.info(f"Created missing index {index.name}")
+
 def init_db():
-    """Initialize database - create all tables"""
+    """Initialize database - create missing tables, columns and indexes"""
     try:
-        Base.metadata.create_all(bind=engine)
+        with engine.begin() as connection:
+            Base.metadata.create_all(bind=connection)
+            _add_missing_schema(connection)
         logging.info("Database initialized successfully")
     except Exception as e:
         logging.error(f"Error initializing database: {e}")
@@ -49,6 +119,103 @@ def get_db() -> Generator[Session, None, None]:
     finally:
         db.close()
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Async database session dependency for FastAPI
+    Usage:
+        @app.get("/users")
+        async def get_users(db: AsyncSession = Depends(get_async_db)):
+            result = await db.execute(select(User))
+            return result.scalars().all()
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+class DeferredTimestampWriter:
+    """
+    Coalesce per-row timestamp updates and write them in bulk from a background task
+
+    Keeps bookkeeping writes such as last_login off the request path: callers
+    queue (row_id, timestamp) pairs and a single task flushes them with one
+    bulk UPDATE per interval, keeping only the latest timestamp per row.
+
+    Usage:
+        last_login_writer = DeferredTimestampWriter(User, "last_login")
+        if not last_login_writer.record(user.id, datetime.utcnow()):
+            ...  # queue full, write inline instead
+    """
+
+    def __init__(self, model, column: str, flush_interval: float = 1.0, maxsize: int = 10_000):
+        """
+        Args:
+            model: ORM model whose rows are updated (primary key must be "id")
+            column: Timestamp column to set
+            flush_interval: Seconds between bulk flushes
+            maxsize: Maximum queued updates before record() refuses new ones
+        """
+        self.model = model
+        self.column = column
+        self.flush_interval = flush_interval
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, row_id: str, timestamp: datetime) -> bool:
+        """
+        Queue a timestamp update (must be called from the event loop)
+
+        Returns:
+            False if the queue is full and the caller should write inline
+        """
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((row_id, timestamp))
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def _ensure_started(self):
+        """Start the flush task on the running loop if it is not already running"""
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self):
+        """Write all queued timestamps in a single bulk UPDATE"""
+        pending: Dict[str, datetime] = {}
+        while not self._queue.empty():
+            row_id, timestamp = self._queue.get_nowait()
+            if row_id not in pending or timestamp > pending[row_id]:
+                pending[row_id] = timestamp
+
+        if not pending:
+            return
+
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(self.model),
+                    [{"id": row_id, self.column: timestamp} for row_id, timestamp in pending.items()]
+                )
+                await db.commit()
+        except Exception as e:
+            logging.error(f"Error flushing {self.model.__tablename__}.{self.column} updates: {e}")
+
+    async def stop(self):
+        """Cancel the flush task and write anything still queued"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, RuntimeError):
+                pass
+            self._task = None
+        await self.flush()
+
 def create_test_user(db: Session, username: str = "admin", password: str = "admin123"):
     """Create a test user for development"""
     from security.auth import hash_password
@@ -2,25 +2,89 @@
 Terraform MCP Server
 Handles infrastructure provisioning through Terraform
 """
-import json
-import subprocess
+import orjson
+import ijson
+import asyncio
+import atexit
+import hashlib
+import shutil
 import tempfile
+import time
 import os
 import re
+from collections import Counter, deque
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Union
 from jinja2 import Template, FileSystemLoader, Environment
 from security.credentials import get_user_credentials
 import uuid
 import logging
 
+ALLOWED_ENVIRONMENTS = frozenset({'dev', 'staging', 'prod'})
+ALLOWED_COMMANDS = frozenset({'init', 'plan', 'apply', 'destroy', 'output', 'show', 'validate'})
+
+# Renders the provider header and includes one per-resource partial for each requested resource
+MASTER_TEMPLATE = 'main.tf.j2'
+
+TERRAFORM_TIMEOUT_SECONDS = 300  # 5 minute timeout
+TERRAFORM_TERMINATE_GRACE_SECONDS = 30  # time to write state and release the lock before SIGKILL
+STREAM_CHUNK_SIZE = 64 * 1024
+STREAM_TAIL_LINES = 50  # trailing stdout lines kept from streamed commands, for error messages
+
+# Overwrite credentials files before unlinking them (off by default, see _cleanup_credentials_file)
+SECURE_DELETE_CREDENTIALS = os.getenv("TF_SECURE_DELETE_CREDENTIALS", "false").lower() == "true"
+
+# Credentials files written but not yet cleaned up, removed at exit if a request dies mid-flight
+_pending_credentials_files = set()
+
+def _remove_pending_credentials_files():
+    """Delete any credentials files left behind by interrupted requests"""
+    for creds_file_path in list(_pending_credentials_files):
+        try:
+            os.unlink(creds_file_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logging.error(f"Error cleaning up credentials file at exit: {e}")
+
+atexit.register(_remove_pending_credentials_files)
+
+# Provider names referenced by resource/data blocks (e.g. "aws" from aws_instance, "random" from random_id)
+PROVIDER_PATTERN = re.compile(r'^\s*(?:resource|data)\s+"([a-z0-9]+)_', re.MULTILINE)
+# Start of the top-level terraform settings block (required_providers, required_version, backend)
+TERRAFORM_BLOCK_PATTERN = re.compile(r'^terraform\s*\{', re.MULTILINE)
+INIT_STAMP_FILE = ".infraagent-providers"
+
+# Shared on-disk cache of plan binaries keyed by config/lockfile/state hash
+PLAN_CACHE_DIR = os.getenv("TF_PLAN_CACHE_DIR", "terraform/plan_cache")
+PLAN_CACHE_TTL_SECONDS = int(os.getenv("TF_PLAN_CACHE_TTL_SECONDS", "3600"))
+PLAN_CACHE_MAX_ENTRIES = int(os.getenv("TF_PLAN_CACHE_MAX_ENTRIES", "256"))
+
+# Simplified monthly cost estimates, priced per size where the resource type has one
+COST_ESTIMATES = {
+    'aws_instance': {'t3.micro': 10.0, 't3.small': 20.0, 't3.medium': 40.0},
+    'aws_db_instance': {'db.t3.micro': 15.0, 'db.t3.small': 30.0},
+    'aws_s3_bucket': 5.0,  # Base cost
+    'aws_lb': 25.0  # Application Load Balancer
+}
+COST_SIZE_ATTRIBUTES = {
+    'aws_instance': 'instance_type',
+    'aws_db_instance': 'instance_class'
+}
+
 class TerraformMCPServer:
     def __init__(self):
         self.template_dir = "mcp/server/templates"
         self.workspace_dir = "terraform/workspaces"
         self.jinja_env = Environment(loader=FileSystemLoader(self.template_dir))
+        self._master_template = self.jinja_env.get_template(MASTER_TEMPLATE)
         self.active_plans = {}
-        
+
+        # Each terraform process can take several hundred MB of RSS, so cap how many run at once
+        self._tf_sem = asyncio.Semaphore(int(os.getenv("TF_CONCURRENCY", "4")))
+        self._tf_waiters = 0
+
     async def plan_infrastructure(self, resources: List[Dict], region: str, environment: str, user_id: str) -> Dict[str, Any]:
         """Generate Terraform plan for requested resources"""
         try:
@@ -47,38 +111,50 @@ class TerraformMCPServer:
                 env_vars['AWS_SHARED_CREDENTIALS_FILE'] = creds_file_path
                 env_vars['AWS_REGION'] = region
 
-                # Initialize Terraform
-                await self._run_terraform_command(['init'], workspace_path, env_vars)
+                # Initialize Terraform (skipped when the workspace is already initialized)
+                await self._ensure_initialized(workspace_path, tf_config, env_vars)
             
-                # Generate plan
+                # Generate plan, reusing a cached plan binary for identical config and state
                 plan_file = f"plan-{uuid.uuid4().hex}.tfplan"
                 plan_path = os.path.join(workspace_path, plan_file)
 
-                result = await self._run_terraform_command(
-                    ['plan', '-out', plan_file, '-detailed-exitcode'],
-                    workspace_path,
-                    env_vars
+                # Hashing state and copying plan binaries is blocking file I/O; keep it off the event loop
+                cache_key = await asyncio.to_thread(
+                    self._plan_cache_key, workspace_path, tf_config, user_id, credentials, region
                 )
+                plan_summary = await asyncio.to_thread(self._load_cached_plan, cache_key, plan_path)
+                from_cache = plan_summary is not None
+
+                if not from_cache:
+                    await self._run_terraform_command(
+                        ['plan', '-out', plan_file, '-detailed-exitcode'],
+                        workspace_path,
+                        env_vars
+                    )
+
+                    # Parse plan output
+                    plan_json = await self._get_plan_json(workspace_path, plan_file, env_vars)
+                    plan_summary = self._summarize_plan(plan_json)
+
+                    # An empty plan_json means `show -json` failed; never cache the placeholder summary
+                    if plan_json:
+                        await asyncio.to_thread(self._store_cached_plan, cache_key, plan_path, plan_summary)
 
-                # Parse plan output
-                plan_json = await self._get_plan_json(workspace_path, plan_file, env_vars)
-            
                 plan_id = str(uuid.uuid4())
                 self.active_plans[plan_id] = {
                     'workspace_path': workspace_path,
                     'plan_file': plan_path,
                     'user_id': user_id,
                     'resources': resources,
-                    'credentials_file': creds_file_path
+                    'credentials_file': creds_file_path,
+                    'from_cache': from_cache
                 }
 
                 return {
                     'success': True,
                     'plan': {
                         'id': plan_id,
-                        'resources_to_create': self._count_resources(plan_json, 'create'),
-                        'estimated_cost': await self._estimate_cost(plan_json),
-                        'summary': self._generate_plan_summary(plan_json)
+                        **plan_summary
                     }
                 }
 
@@ -114,7 +190,7 @@ class TerraformMCPServer:
                 env_vars['AWS_SHARED_CREDENTIALS_FILE'] = creds_file_path
 
                 # Apply the plan
-                result = await self._run_terraform_command(
+                await self._run_terraform_command(
                     ['apply', os.path.basename(plan_info['plan_file'])],
                     plan_info['workspace_path'],
                     env_vars
@@ -154,12 +230,16 @@ class TerraformMCPServer:
         Raises:
             ValueError: If inputs are invalid or path traversal is detected
         """
-        # Validate user_id format (UUID)
-        if not re.match(r'^[a-f0-9\-]{36}$', user_id):
+        # Validate user_id format (canonical lowercase UUID, as generated for User.id)
+        try:
+            is_canonical = str(uuid.UUID(user_id)) == user_id
+        except (ValueError, TypeError, AttributeError):
+            is_canonical = False
+        if not is_canonical:
             raise ValueError(f"Invalid user_id format: {user_id}")
 
         # Validate environment
-        if environment not in ['dev', 'staging', 'prod']:
+        if environment not in ALLOWED_ENVIRONMENTS:
             raise ValueError(f"Invalid environment: {environment}. Must be dev, staging, or prod")
 
         # Create workspace path
@@ -181,39 +261,224 @@ class TerraformMCPServer:
     
     async def _generate_terraform_config(self, resources: List[Dict], region: str, environment: str) -> str:
         """Generate Terraform configuration from resource definitions"""
-        config_parts = [
-            # Provider configuration
-            f'''
-terraform {{
-  required_providers {{
-    aws = {{
-      source  = "hashicorp/aws"
-      version = "~> 5.0"
-    }}
-  }}
-}}
-
-provider "aws" {{
-  region = "{region}"
-}}
-'''
-        ]
-        
-        # Generate resource configurations
-        for i, resource in enumerate(resources):
-            template_name = self._get_template_name(resource['type'])
-            template = self.jinja_env.get_template(template_name)
-            
-            resource_config = template.render(
-                resource_name=f"{resource['type']}_{i}",
-                config=resource['config'],
-                environment=environment,
-                index=i
-            )
-            config_parts.append(resource_config)
-        
-        return '\n'.join(config_parts)
-    
+        return self._master_template.render(
+            region=region,
+            environment=environment,
+            resources=[
+                {
+                    'name': f"{resource['type']}_{i}",
+                    'template': self._get_template_name(resource['type']),
+                    'config': resource['config']
+                }
+                for i, resource in enumerate(resources)
+            ]
+        )
+
+    def _terraform_block(self, tf_config: str) -> str:
+        """Extract the top-level terraform { ... } block (empty if there is none)"""
+        match = TERRAFORM_BLOCK_PATTERN.search(tf_config)
+        if not match:
+            return ""
+
+        depth = 0
+        for i in range(match.end() - 1, len(tf_config)):
+            if tf_config[i] == '{':
+                depth += 1
+            elif tf_config[i] == '}':
+                depth -= 1
+                if depth == 0:
+                    return tf_config[match.start():i + 1]
+        return tf_config[match.start():]
+
+    def _init_stamp(self, workspace_path: str, tf_config: str) -> Optional[str]:
+        """
+        Digest of everything terraform init depends on, or None if the workspace has no lock file
+
+        Covers the providers the resources use, the terraform block (required_providers
+        sources and version constraints) and the lock file init produced.
+        """
+        try:
+            with open(os.path.join(workspace_path, ".terraform.lock.hcl"), 'rb') as f:
+                lock = f.read()
+        except FileNotFoundError:
+            return None
+
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (
+            ",".join(sorted(set(PROVIDER_PATTERN.findall(tf_config)))).encode(),
+            self._terraform_block(tf_config).encode(),
+            lock
+        ):
+            digest.update(len(part).to_bytes(8, 'big'))
+            digest.update(part)
+        return digest.hexdigest()
+
+    async def _ensure_initialized(self, workspace_path: str, tf_config: str, env: Dict[str, str]):
+        """
+        Run terraform init only when the workspace needs it
+
+        Re-initializing downloads and loads every provider, so it is skipped when
+        the workspace was already initialized for the same providers, provider
+        requirements and lock file. When an initialized workspace's requirements
+        change, init runs with -upgrade so the lock file follows new version constraints.
+
+        Args:
+            workspace_path: Workspace directory
+            tf_config: Rendered Terraform configuration
+            env: Environment variables
+        """
+        stamp_path = os.path.join(workspace_path, ".terraform", INIT_STAMP_FILE)
+        stamp = self._init_stamp(workspace_path, tf_config)
+
+        try:
+            with open(stamp_path) as f:
+                if stamp is not None and f.read() == stamp:
+                    logging.info(f"Reusing initialized workspace: {workspace_path}")
+                    return
+        except FileNotFoundError:
+            pass
+
+        # A locked provider outside a changed version constraint makes plain init fail
+        await self._run_terraform_command(
+            ['init', '-upgrade'] if stamp is not None else ['init'],
+            workspace_path,
+            env
+        )
+
+        with open(stamp_path, 'w') as f:
+            f.write(self._init_stamp(workspace_path, tf_config) or "")
+
+    def _plan_cache_key(
+        self,
+        workspace_path: str,
+        tf_config: str,
+        user_id: str,
+        credentials: Dict[str, Any],
+        region: str
+    ) -> str:
+        """
+        Compute the plan cache key for a workspace
+
+        The key covers the rendered configuration, the provider lock file, the
+        current state and the cloud identity the plan runs as (user, access key
+        and region). Plans embed data source results such as aws_ami and
+        aws_availability_zones, which depend on the account, so a cached plan is
+        never shared between users or credentials.
+
+        Args:
+            workspace_path: Initialized workspace directory
+            tf_config: Rendered Terraform configuration
+            user_id: User the plan is generated for
+            credentials: Decrypted cloud credentials (only the access key id is hashed)
+            region: Cloud region
+
+        Returns:
+            Hex digest identifying the plan
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        identity = "\0".join((user_id, credentials.get('aws_access_key', ''), region))
+        digest.update(len(identity.encode()).to_bytes(8, 'big'))
+        digest.update(identity.encode())
+        digest.update(tf_config.encode())
+
+        for name in (".terraform.lock.hcl", "terraform.tfstate"):
+            try:
+                with open(os.path.join(workspace_path, name), 'rb') as f:
+                    content = f.read()
+            except FileNotFoundError:
+                content = b""
+            digest.update(len(content).to_bytes(8, 'big'))
+            digest.update(content)
+
+        return digest.hexdigest()
+
+    def _load_cached_plan(self, cache_key: str, plan_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Copy a cached plan binary into the workspace if a fresh one exists
+
+        Freshness is measured from when the plan was created (stored in the summary
+        file), not from its mtime, which is bumped on every hit for LRU eviction.
+
+        Args:
+            cache_key: Plan cache key
+            plan_path: Destination plan file in the workspace
+
+        Returns:
+            Cached plan summary, or None on a cache miss
+        """
+        cached_plan = os.path.join(PLAN_CACHE_DIR, f"plan-{cache_key}.tfplan")
+        cached_summary = os.path.join(PLAN_CACHE_DIR, f"plan-{cache_key}.json")
+
+        try:
+            with open(cached_summary, 'rb') as f:
+                cached = orjson.loads(f.read())
+
+            if time.time() - cached['created_at'] > PLAN_CACHE_TTL_SECONDS:
+                return None
+
+            plan_summary = cached['summary']
+            shutil.copyfile(cached_plan, plan_path)
+
+            # Bump mtime so eviction drops least recently used entries first
+            os.utime(cached_plan)
+            os.utime(cached_summary)
+        except (OSError, orjson.JSONDecodeError, KeyError, TypeError):
+            return None
+
+        logging.info(f"Reusing cached terraform plan {cache_key}")
+        return plan_summary
+
+    def _store_cached_plan(self, cache_key: str, plan_path: str, plan_summary: Dict[str, Any]):
+        """
+        Save a plan binary and its summary to the shared plan cache
+
+        Args:
+            cache_key: Plan cache key
+            plan_path: Plan file produced in the workspace
+            plan_summary: Summary returned by _summarize_plan
+        """
+        try:
+            os.makedirs(PLAN_CACHE_DIR, mode=0o700, exist_ok=True)
+
+            # Write to temporary names and rename so readers never see partial files
+            tmp_suffix = f".{uuid.uuid4().hex}.tmp"
+            cached_plan = os.path.join(PLAN_CACHE_DIR, f"plan-{cache_key}.tfplan")
+            cached_summary = os.path.join(PLAN_CACHE_DIR, f"plan-{cache_key}.json")
+
+            shutil.copyfile(plan_path, cached_plan + tmp_suffix)
+            with open(cached_summary + tmp_suffix, 'wb') as f:
+                f.write(orjson.dumps({'created_at': time.time(), 'summary': plan_summary}))
+
+            os.replace(cached_summary + tmp_suffix, cached_summary)
+            os.replace(cached_plan + tmp_suffix, cached_plan)
+
+            self._evict_cached_plans()
+        except OSError as e:
+            logging.warning(f"Could not cache terraform plan: {e}")
+
+    def _evict_cached_plans(self):
+        """
+        Drop plan cache entries unused for longer than the TTL, then the least recently used beyond the size limit
+
+        mtime is the last use here; entries that are still used but older than the TTL
+        are rejected by _load_cached_plan and overwritten by the next store.
+        """
+        entries = []
+        for entry in os.scandir(PLAN_CACHE_DIR):
+            if entry.name.endswith(".tfplan"):
+                entries.append((entry.stat().st_mtime, entry.path))
+
+        entries.sort(reverse=True)
+        now = time.time()
+
+        for i, (mtime, cached_plan) in enumerate(entries):
+            if i >= PLAN_CACHE_MAX_ENTRIES or now - mtime > PLAN_CACHE_TTL_SECONDS:
+                for path in (cached_plan, cached_plan[:-len(".tfplan")] + ".json"):
+                    try:
+                        os.unlink(path)
+                    except FileNotFoundError:
+                        pass
+
     def _get_template_name(self, resource_type: str) -> str:
         """Map resource type to template file"""
         template_map = {
@@ -224,22 +489,60 @@ provider "aws" {{
         }
         return template_map.get(resource_type, 'aws/ec2.tf.j2')
     
-    async def _run_terraform_command(self, cmd: List[str], cwd: str, env: Dict[str, str]) -> str:
+    async def _run_terraform_command(
+        self,
+        cmd: List[str],
+        cwd: str,
+        env: Dict[str, str],
+        raw: bool = False
+    ) -> Union[str, bytes]:
         """
         Run terraform command with security validation
 
+        Text output is streamed line by line into the log as terraform produces it;
+        only its last STREAM_TAIL_LINES lines are kept, so memory stays bounded
+        however much terraform prints.
+
         Args:
             cmd: Terraform command arguments (validated)
             cwd: Working directory (must be validated workspace path)
             env: Environment variables
+            raw: Return stdout as undecoded bytes (for JSON consumers)
 
         Returns:
-            Command output
+            Full stdout bytes if raw, otherwise the trailing lines of text output
 
         Raises:
             ValueError: If path validation fails
             Exception: If terraform command fails
         """
+        async with self._terraform_process(cmd, cwd, env) as process:
+            if raw:
+                stdout, stderr = await self._with_timeout(process.communicate())
+            else:
+                stdout, stderr = await self._with_timeout(self._stream_output(process, cmd[0]))
+
+        self._check_returncode(process, stderr, stdout if not raw else "")
+        return stdout
+
+    @asynccontextmanager
+    async def _terraform_process(self, cmd: List[str], cwd: str, env: Dict[str, str]):
+        """
+        Validate and spawn a terraform process, holding a worker slot while it runs
+
+        The process is stopped if the caller exits early (error, timeout or cancellation).
+
+        Args:
+            cmd: Terraform command arguments (validated)
+            cwd: Working directory (must be validated workspace path)
+            env: Environment variables
+
+        Yields:
+            Running process with piped stdout and stderr
+
+        Raises:
+            ValueError: If path or command validation fails
+        """
         # Validate workspace path
         workspace_path = Path(cwd).resolve()
         expected_base = Path(self.workspace_dir).resolve()
@@ -254,55 +557,208 @@ provider "aws" {{
             raise ValueError(f"Workspace path does not exist: {cwd}")
 
         # Validate command arguments to prevent injection
-        allowed_commands = ['init', 'plan', 'apply', 'destroy', 'output', 'show', 'validate']
-        if cmd and cmd[0] not in allowed_commands:
+        if cmd and cmd[0] not in ALLOWED_COMMANDS:
             raise ValueError(f"Terraform command not allowed: {cmd[0]}")
 
         full_cmd = ['terraform'] + cmd
 
         logging.info(f"Executing terraform command: {' '.join(full_cmd)} in {cwd}")
 
+        # Bound concurrent terraform processes; excess commands queue here
+        self._tf_waiters += 1
         try:
-            process = subprocess.run(
-                full_cmd,
+            await self._tf_sem.acquire()
+        finally:
+            self._tf_waiters -= 1
+
+        process = None
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *full_cmd,
                 cwd=str(workspace_path),
                 env=env,
-                capture_output=True,
-                text=True,
-                timeout=300  # 5 minute timeout
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
             )
+            yield process
+        finally:
+            try:
+                if process is not None and process.returncode is None:
+                    await self._stop_process(process)
+            finally:
+                self._tf_sem.release()
 
-            if process.returncode != 0:
-                logging.error(f"Terraform command failed: {process.stderr}")
-                raise Exception(f"Terraform command failed: {process.stderr}")
+    async def _stop_process(self, process):
+        """
+        Stop a terraform process that is still running
 
-            return process.stdout
+        SIGTERM first, so an interrupted apply/destroy can persist state and release
+        its lock; SIGKILL only if it has not exited after the grace period (or if the
+        wait itself is cancelled).
 
-        except subprocess.TimeoutExpired:
-            logging.error(f"Terraform command timed out after 300 seconds")
-            raise Exception("Terraform command timed out after 5 minutes")
-    
-    async def _estimate_cost(self, plan_json: Dict) -> float:
-        """Estimate monthly cost of resources (simplified)"""
-        # This is a simplified cost estimation
-        # In production, you'd integrate with AWS Cost Explorer API
-        
-        cost_estimates = {
-            'aws_instance': {'t3.micro': 10.0, 't3.small': 20.0, 't3.medium': 40.0},
-            'aws_db_instance': {'db.t3.micro': 15.0, 'db.t3.small': 30.0},
-            'aws_s3_bucket': 5.0,  # Base cost
-            'aws_lb': 25.0  # Application Load Balancer
-        }
-        
+        Args:
+            process: Running terraform process
+        """
+        try:
+            process.terminate()
+            await asyncio.wait_for(process.wait(), timeout=TERRAFORM_TERMINATE_GRACE_SECONDS)
+        except ProcessLookupError:
+            pass
+        except asyncio.TimeoutError:
+            logging.error(f"Terraform did not exit within {TERRAFORM_TERMINATE_GRACE_SECONDS}s of SIGTERM; killing it")
+            self._kill_process(process)
+            await process.wait()
+        except asyncio.CancelledError:
+            self._kill_process(process)
+            await process.wait()
+            raise
+
+    def _kill_process(self, process):
+        """SIGKILL a process, ignoring one that has already exited"""
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+
+    async def _with_timeout(self, awaitable):
+        """Await terraform I/O, failing after the command timeout"""
+        try:
+            return await asyncio.wait_for(awaitable, timeout=TERRAFORM_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            logging.error(f"Terraform command timed out after {TERRAFORM_TIMEOUT_SECONDS} seconds")
+            raise Exception(f"Terraform command timed out after {TERRAFORM_TIMEOUT_SECONDS // 60} minutes")
+
+    def _check_returncode(self, process, stderr: bytes, stdout_tail: str = ""):
+        """Raise if a finished terraform process exited with an error"""
+        if process.returncode != 0:
+            # Some errors only reach stdout; fall back to its tail when stderr is empty
+            error_output = stderr.decode(errors="replace") or stdout_tail
+            logging.error(f"Terraform command failed: {error_output}")
+            raise Exception(f"Terraform command failed: {error_output}")
+
+    async def _stream_output(self, process, label: str):
+        """
+        Log terraform text output line by line as it is produced
+
+        stdout is read in fixed-size chunks and split here, so lines longer than the
+        StreamReader buffer limit are handled instead of raising ValueError. Lines are
+        logged and dropped; only the last STREAM_TAIL_LINES are kept.
+
+        Args:
+            process: Running terraform process
+            label: Subcommand name used as the log prefix
+
+        Returns:
+            Tuple of (trailing stdout text, stderr bytes)
+        """
+        stderr_task = asyncio.ensure_future(process.stderr.read())
+        try:
+            lines = deque(maxlen=STREAM_TAIL_LINES)
+            pending = b""
+            while chunk := await process.stdout.read(STREAM_CHUNK_SIZE):
+                *complete, pending = (pending + chunk).split(b"\n")
+                if len(pending) >= STREAM_CHUNK_SIZE:
+                    # Log an unterminated line in chunk-sized pieces rather than buffering all of it
+                    complete.append(pending)
+                    pending = b""
+                for line in complete:
+                    text = line.decode(errors="replace")
+                    logging.info(f"terraform {label}: {text.rstrip()}")
+                    lines.append(text + "\n")
+
+            if pending:
+                text = pending.decode(errors="replace")
+                logging.info(f"terraform {label}: {text.rstrip()}")
+                lines.append(text)
+
+            await process.wait()
+            return ''.join(lines), await stderr_task
+        finally:
+            if not stderr_task.done():
+                stderr_task.cancel()
+
+    async def _stream_resource_changes(self, process):
+        """
+        Parse resource_changes from `terraform show -json` as the JSON is produced
+
+        Only the resource_changes items are materialized; the rest of the plan
+        document (prior state, configuration, planned values) is discarded in chunks.
+
+        Args:
+            process: Running `terraform show -json` process
+
+        Returns:
+            Tuple of (resource_changes list, stderr bytes)
+        """
+        stderr_task = asyncio.ensure_future(process.stderr.read())
+        try:
+            resource_changes = [
+                change async for change in ijson.items(process.stdout, 'resource_changes.item', use_float=True)
+            ]
+
+            # Drain the rest of the document so terraform can exit
+            while await process.stdout.read(STREAM_CHUNK_SIZE):
+                pass
+
+            await process.wait()
+            return resource_changes, await stderr_task
+        finally:
+            if not stderr_task.done():
+                stderr_task.cancel()
+
+    @property
+    def terraform_queue_depth(self) -> int:
+        """Number of terraform commands waiting for a free worker slot"""
+        return self._tf_waiters
+
+    def _summarize_plan(self, plan_json: Dict) -> Dict[str, Any]:
+        """
+        Summarize a plan in a single pass over its resource changes
+
+        Counts resources per action and estimates monthly cost of created
+        resources (simplified - in production, integrate with AWS Cost Explorer API)
+
+        Args:
+            plan_json: Terraform plan JSON
+
+        Returns:
+            Dict with resources_to_create, estimated_cost and summary
+        """
+        action_counts = Counter()
         total_cost = 0.0
-        
-        # This would parse the actual plan JSON in production
-        # For now, return a placeholder
-        return total_cost or 50.0  # Placeholder cost
-    
-    def _generate_plan_summary(self, plan_json: Dict) -> str:
-        """Generate human-readable plan summary"""
-        return "Plan will create infrastructure resources as requested."
+
+        try:
+            for resource in (plan_json or {}).get('resource_changes', []):
+                change = resource.get('change', {})
+                actions = change.get('actions', [])
+                action_counts.update(actions)
+
+                if 'create' in actions:
+                    total_cost += self._estimate_resource_cost(resource.get('type'), change.get('after') or {})
+        except Exception as e:
+            logging.warning(f"Error summarizing plan: {e}")
+
+        if action_counts:
+            summary = (
+                f"Plan: {action_counts['create']} to add, {action_counts['update']} to change, "
+                f"{action_counts['delete']} to destroy."
+            )
+        else:
+            summary = "Plan will create infrastructure resources as requested."
+
+        return {
+            'resources_to_create': action_counts['create'],
+            'estimated_cost': total_cost or 50.0,  # Placeholder cost when nothing could be priced
+            'summary': summary
+        }
+
+    def _estimate_resource_cost(self, resource_type: str, attributes: Dict[str, Any]) -> float:
+        """Look up the estimated monthly cost of a single resource"""
+        estimate = COST_ESTIMATES.get(resource_type, 0.0)
+        if isinstance(estimate, dict):
+            size = attributes.get(COST_SIZE_ATTRIBUTES.get(resource_type, ''))
+            return estimate.get(size, 0.0)
+        return estimate
 
     async def _create_secure_credentials_file(self, workspace_path: str, credentials: Dict[str, Any], region: str) -> str:
         """
@@ -336,28 +792,37 @@ provider "aws" {{
 
         # Ensure restrictive permissions
         os.chmod(creds_file_path, 0o600)
+        _pending_credentials_files.add(creds_file_path)
 
         logging.info(f"Created secure credentials file: {creds_file_path}")
         return creds_file_path
 
     async def _cleanup_credentials_file(self, creds_file_path: str):
         """
-        Securely delete credentials file
+        Delete credentials file
+
+        The file is only overwritten first when TF_SECURE_DELETE_CREDENTIALS is
+        enabled; on journaled, copy-on-write and SSD storage an in-place
+        overwrite does not reach the original blocks.
 
         Args:
             creds_file_path: Path to credentials file to delete
         """
         try:
-            if os.path.exists(creds_file_path):
-                # Overwrite file with random data before deletion (extra security)
-                with open(creds_file_path, 'wb') as f:
-                    f.write(os.urandom(1024))
-
-                # Delete the file
-                os.unlink(creds_file_path)
-                logging.info(f"Cleaned up credentials file: {creds_file_path}")
+            if SECURE_DELETE_CREDENTIALS:
+                with open(creds_file_path, 'r+b') as f:
+                    f.write(os.urandom(os.fstat(f.fileno()).st_size))
+                    f.flush()
+                    os.fsync(f.fileno())
+
+            os.unlink(creds_file_path)
+            logging.info(f"Cleaned up credentials file: {creds_file_path}")
+        except FileNotFoundError:
+            pass
         except Exception as e:
             logging.error(f"Error cleaning up credentials file: {e}")
+        finally:
+            _pending_credentials_files.discard(creds_file_path)
 
     async def _get_plan_json(self, workspace_path: str, plan_file: str, env: Dict[str, str]) -> Dict[str, Any]:
         """
@@ -369,16 +834,15 @@ provider "aws" {{
             env: Environment variables
 
         Returns:
-            Plan JSON dictionary
+            Plan JSON dictionary (resource_changes only), or {} if it could not be read
         """
         try:
-            # Run terraform show to get JSON
-            result = await self._run_terraform_command(
-                ['show', '-json', plan_file],
-                workspace_path,
-                env
-            )
-            return json.loads(result) if result else {}
+            # Run terraform show and stream-parse its JSON
+            async with self._terraform_process(['show', '-json', plan_file], workspace_path, env) as process:
+                resource_changes, stderr = await self._with_timeout(self._stream_resource_changes(process))
+
+            self._check_returncode(process, stderr)
+            return {'resource_changes': resource_changes}
         except Exception as e:
             logging.warning(f"Could not parse plan JSON: {e}")
             return {}
@@ -398,35 +862,10 @@ provider "aws" {{
             result = await self._run_terraform_command(
                 ['output', '-json'],
                 workspace_path,
-                env
+                env,
+                raw=True
             )
-            return json.loads(result) if result else {}
+            return orjson.loads(result) if result else {}
         except Exception as e:
             logging.warning(f"Could not get terraform outputs: {e}")
             return {}
-
-    def _count_resources(self, plan_json: Dict, action: str) -> int:
-        """
-        Count resources in plan by action type
-
-        Args:
-            plan_json: Terraform plan JSON
-            action: Action type ('create', 'update', 'delete')
-
-        Returns:
-            Count of resources
-        """
-        try:
-            if not plan_json or 'resource_changes' not in plan_json:
-                return 0
-
-            count = 0
-            for resource in plan_json.get('resource_changes', []):
-                actions = resource.get('change', {}).get('actions', [])
-                if action in actions:
-                    count += 1
-
-            return count
-        except Exception as e:
-            logging.warning(f"Error counting resources: {e}")
-            return 0
\ No newline at end of file
@@ -3,12 +3,12 @@ Audit Logging Utilities
 Provides comprehensive audit logging for security-sensitive operations
 """
 from typing import Dict, Any, Optional
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import Request
 from database.models import AuditLog
 from datetime import datetime
 import logging
-import json
+import orjson
 
 logger = logging.getLogger(__name__)
 
@@ -50,8 +50,15 @@ def redact_sensitive_data(data: Dict[str, Any]) -> Dict[str, Any]:
     return redacted
 
 
+def _dump_audit_payload(data: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Serialize an audit payload with sorted keys so entries are deterministic"""
+    if not data:
+        return None
+    return orjson.dumps(data, option=orjson.OPT_SORT_KEYS).decode()
+
+
 async def create_audit_log(
-    db: Session,
+    db: AsyncSession,
     user_id: str,
     action: str,
     resource_type: Optional[str] = None,
@@ -66,7 +73,7 @@ async def create_audit_log(
     Create comprehensive audit log entry
 
     Args:
-        db: Database session
+        db: Async database session
         user_id: User ID performing the action
         action: Action being performed (e.g., "login", "create_resource")
         resource_type: Type of resource being acted upon
@@ -97,8 +104,8 @@ async def create_audit_log(
             action=action,
             resource_type=resource_type,
             resource_id=resource_id,
-            request_data=json.dumps(sanitized_request) if sanitized_request else None,
-            response_data=json.dumps(sanitized_response) if sanitized_response else None,
+            request_data=_dump_audit_payload(sanitized_request),
+            response_data=_dump_audit_payload(sanitized_response),
             success=success,
             error_message=error_message,
             ip_address=client_ip,
@@ -107,7 +114,7 @@ async def create_audit_log(
         )
 
         db.add(audit_log)
-        db.commit()
+        await db.commit()
 
         # Log to application logs for external SIEM integration
         log_message = f"AUDIT: {action} by user {user_id} from {client_ip} - {'SUCCESS' if success else 'FAILED'}"
@@ -119,7 +126,7 @@ async def create_audit_log(
     except Exception as e:
         logger.exception("Failed to create audit log")
         # Don't fail the main operation if audit logging fails
-        db.rollback()
+        await db.rollback()
 
 
 class AuditLogger:
@@ -130,7 +137,7 @@ class AuditLogger:
 
     def __init__(
         self,
-        db: Session,
+        db: AsyncSession,
         user_id: str,
         action: str,
         resource_type: Optional[str] = None,
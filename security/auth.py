@@ -3,18 +3,30 @@ Authentication and Authorization
 JWT-based authentication with password hashing
 """
 
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Sequence
 from jose import JWTError, jwt
-from passlib.context import CryptContext
+from argon2 import PasswordHasher, extract_parameters
+from argon2.exceptions import InvalidHashError, VerificationError
+from passlib.hash import bcrypt
 from fastapi import HTTPException, Security, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select, bindparam
+from sqlalchemy.ext.asyncio import AsyncSession
+from cachetools import TTLCache, TLRUCache
+import asyncio
+import dataclasses
+import hashlib
 import os
+import secrets
+import threading
+import time
 import logging
 
 from database.models import User, UserRole
-from database.session import get_db
+from database.session import get_async_db, AsyncSessionLocal, DeferredTimestampWriter
 
 # Security configuration
 SECRET_KEY = os.getenv("SECRET_KEY")
@@ -27,23 +39,121 @@ if not SECRET_KEY or SECRET_KEY == "your-secret-key-change-in-production":
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing: Argon2id, spreading each hash across ARGON2_PARALLELISM lanes
+# Parallelism is a fixed constant (not the CPU count) so hosts of different sizes produce identical hashes
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", str(64 * 1024)))  # KiB
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "4"))
+
+password_hasher = PasswordHasher(
+    time_cost=ARGON2_TIME_COST,
+    memory_cost=ARGON2_MEMORY_COST,
+    parallelism=ARGON2_PARALLELISM
+)
+
+# Hashes created before the move to Argon2; still verified, and rehashed on the next successful login
+LEGACY_BCRYPT_PREFIX = "$2"
 
 # Precomputed dummy hash for timing protection (constant-time verification)
-# This is hashed once at startup to avoid timing differences in authentication
-DUMMY_PASSWORD_HASH = pwd_context.hash("dummy_password_to_maintain_constant_timing")
+# Hashed once at startup with the same parameters as real hashes, from a random secret nobody knows
+DUMMY_PASSWORD_HASH = password_hasher.hash(secrets.token_urlsafe(16))
+
+# Current Argon2 parameters, read back from the dummy hash for rehash decisions
+_ARGON2_PARAMETERS = extract_parameters(DUMMY_PASSWORD_HASH)
+
+# While legacy bcrypt hashes remain, unknown usernames are checked against a bcrypt dummy hash
+# of the same cost, so unmigrated accounts cannot be told apart from non-existent ones by timing.
+# The users table is re-sampled every LEGACY_HASH_CHECK_INTERVAL_SECONDS until none are left.
+LEGACY_HASH_CHECK_INTERVAL_SECONDS = 300
+_LEGACY_HASH_SAMPLE = select(User.password_hash).where(User.password_hash.startswith(LEGACY_BCRYPT_PREFIX)).limit(1)
+_legacy_dummy_hashes: Dict[int, str] = {}  # bcrypt cost -> dummy hash
+_legacy_dummy_hash: Optional[str] = None
+_legacy_hash_checked_at = float("-inf")
+
+# argon2 and bcrypt release the GIL, so hashing on this pool runs in parallel without blocking the event loop
+# Each Argon2 hash already occupies ARGON2_PARALLELISM threads (and ARGON2_MEMORY_COST KiB), so size the pool to match
+_PASSWORD_HASH_POOL = ThreadPoolExecutor(
+    max_workers=max(1, (os.cpu_count() or 1) // ARGON2_PARALLELISM),
+    thread_name_prefix="password-hash"
+)
 
 # HTTP Bearer token
 security = HTTPBearer()
 
+# Verified JWT payloads keyed by a digest of the token (the raw token is never retained)
+# Entries expire at the token's own exp or after TOKEN_CACHE_MAX_TTL_SECONDS, whichever is first
+TOKEN_CACHE_MAX_TTL_SECONDS = 60
+_token_cache: TLRUCache = TLRUCache(
+    maxsize=4096,
+    ttu=lambda _key, payload, now: min(payload["exp"], now + TOKEN_CACHE_MAX_TTL_SECONDS),
+    timer=time.time
+)
+_token_cache_lock = threading.Lock()
+
+# Short-lived cache of authenticated users keyed by user_id
+# Avoids a users-table round-trip on every authenticated request
+USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+_user_cache: TTLCache = TTLCache(maxsize=10_000, ttl=USER_CACHE_TTL_SECONDS)
+_user_cache_lock = threading.Lock()
+
+# last_login is bookkeeping only; batch it off the login path
+last_login_writer = DeferredTimestampWriter(User, "last_login")
+
+@dataclass(frozen=True)
+class AuthenticatedUser:
+    """
+    Immutable snapshot of the user columns authorization needs
+
+    Returned by get_current_user and shared through the user cache across concurrent
+    requests, so it is never an ORM instance. Handlers that need other columns (or
+    want to modify the user) load the User row in their own session.
+    """
+    id: str
+    username: str
+    role: UserRole
+    is_active: bool
+
+# User lookup statements, built once at import and reused for every request
+_AUTH_USER_COLUMNS = (User.id, User.username, User.role, User.is_active)
+_USER_BY_ID = select(*_AUTH_USER_COLUMNS).where(User.id == bindparam("uid"))
+_USERS_BY_IDS = select(*_AUTH_USER_COLUMNS).where(User.id.in_(bindparam("uids", expanding=True)))
+
 def hash_password(password: str) -> str:
-    """Hash a password using bcrypt"""
-    return pwd_context.hash(password)
+    """Hash a password using Argon2id"""
+    return password_hasher.hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    """Verify a password against its hash (Argon2id, or a legacy bcrypt hash)"""
+    if hashed_password.startswith(LEGACY_BCRYPT_PREFIX):
+        return bcrypt.verify(plain_password, hashed_password)
+
+    try:
+        return password_hasher.verify(hashed_password, plain_password)
+    except (VerificationError, InvalidHashError):
+        return False
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    Whether a stored hash is legacy bcrypt or uses outdated Argon2 parameters
+
+    Parallelism is ignored: it does not change a hash's strength, and a host-specific
+    ARGON2_PARALLELISM would otherwise rehash on every login that lands on another host.
+    """
+    if hashed_password.startswith(LEGACY_BCRYPT_PREFIX):
+        return True
+
+    parameters = extract_parameters(hashed_password)
+    return dataclasses.replace(parameters, parallelism=ARGON2_PARALLELISM) != _ARGON2_PARAMETERS
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password on the password hashing pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_PASSWORD_HASH_POOL, hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash on the password hashing pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_PASSWORD_HASH_POOL, verify_password, plain_password, hashed_password)
 
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """
@@ -71,6 +181,7 @@ def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta]
 def decode_access_token(token: str) -> Dict[str, Any]:
     """
     Decode and verify a JWT token
+    Verified payloads are cached until the token expires (at most 60 seconds)
 
     Args:
         token: JWT token to decode
@@ -81,73 +192,125 @@ def decode_access_token(token: str) -> Dict[str, Any]:
     Raises:
         HTTPException: If token is invalid or expired
     """
+    cache_key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+    with _token_cache_lock:
+        payload = _token_cache.get(cache_key)
+    if payload is not None:
+        return dict(payload)
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except JWTError as e:
         logging.error(f"JWT decode error: {e}")
         raise HTTPException(status_code=401, detail="Invalid or expired token")
 
-def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
+    if isinstance(payload.get("exp"), (int, float)):
+        with _token_cache_lock:
+            _token_cache[cache_key] = dict(payload)
+
+    return payload
+
+async def _dummy_hash_for_unknown_user(db: AsyncSession) -> str:
+    """
+    Dummy hash that unknown usernames are verified against
+
+    A bcrypt hash matching the cost of a remaining legacy hash, or the Argon2 dummy once
+    every user has been migrated (after which the users table is no longer sampled).
+    """
+    global _legacy_dummy_hash, _legacy_hash_checked_at
+
+    now = time.monotonic()
+    if now - _legacy_hash_checked_at >= LEGACY_HASH_CHECK_INTERVAL_SECONDS:
+        legacy_hash = (await db.execute(_LEGACY_HASH_SAMPLE)).scalar_one_or_none()
+        if legacy_hash is None:
+            _legacy_dummy_hash = None
+            _legacy_hash_checked_at = float("inf")
+        else:
+            rounds = int(legacy_hash.split("$")[2])
+            if rounds not in _legacy_dummy_hashes:
+                loop = asyncio.get_running_loop()
+                _legacy_dummy_hashes[rounds] = await loop.run_in_executor(
+                    _PASSWORD_HASH_POOL, bcrypt.using(rounds=rounds).hash, secrets.token_urlsafe(16)
+                )
+            _legacy_dummy_hash = _legacy_dummy_hashes[rounds]
+            _legacy_hash_checked_at = now
+
+    return _legacy_dummy_hash or DUMMY_PASSWORD_HASH
+
+async def authenticate_user(db: AsyncSession, username: str, password: str) -> Optional[User]:
     """
     Authenticate a user with username and password
     Uses constant-time comparison to prevent timing attacks
 
     Args:
-        db: Database session
+        db: Async database session
         username: Username
         password: Plain text password
 
     Returns:
         User object if authentication successful, None otherwise
     """
-    user = db.query(User).filter(User.username == username).first()
+    result = await db.execute(select(User).where(User.username == username))
+    user = result.scalar_one_or_none()
 
     # Always verify password even if user doesn't exist
     # This prevents timing attacks for username enumeration
     if not user:
-        # Perform dummy verification to maintain constant timing
-        pwd_context.verify("dummy_password_to_maintain_constant_timing", DUMMY_PASSWORD_HASH)
+        # Verify the supplied password against the dummy hash to maintain constant timing
+        await verify_password_async(password, await _dummy_hash_for_unknown_user(db))
         logging.warning(f"Failed login attempt for non-existent user: {username}")
         return None
 
     # Check if user is active
     if not user.is_active:
         # Still verify password to maintain constant timing
-        verify_password(password, user.password_hash)
+        await verify_password_async(password, user.password_hash)
+        invalidate_user(user.id)
         logging.warning(f"Failed login attempt for inactive user: {username}")
         return None
 
     # Verify password
-    if not verify_password(password, user.password_hash):
+    if not await verify_password_async(password, user.password_hash):
         logging.warning(f"Failed login attempt with wrong password for user: {username}")
         return None
 
-    # Update last login
-    user.last_login = datetime.utcnow()
-    db.commit()
+    # A fresh login picks up any role change made since the user was cached
+    invalidate_user(user.id)
+
+    # Upgrade legacy bcrypt (or outdated Argon2) hashes while the plain password is at hand
+    if password_needs_rehash(user.password_hash):
+        user.password_hash = await hash_password_async(password)
+        await db.commit()
+        logging.info(f"Rehashed password for user: {username}")
+
+    # Update last login in the background, or inline if the write queue is full
+    now = datetime.utcnow()
+    if not last_login_writer.record(user.id, now):
+        user.last_login = now
+        await db.commit()
 
     logging.info(f"Successful login for user: {username}")
     return user
 
-def get_current_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Security(security),
-    db: Session = Depends(get_db)
-) -> User:
+    db: AsyncSession = Depends(get_async_db)
+) -> AuthenticatedUser:
     """
     FastAPI dependency to get the current authenticated user
 
     Usage:
         @app.get("/protected")
-        def protected_route(current_user: User = Depends(get_current_user)):
+        def protected_route(current_user: AuthenticatedUser = Depends(get_current_user)):
             return {"user_id": current_user.id}
 
     Args:
         credentials: HTTP Authorization Bearer token
-        db: Database session
+        db: Async database session
 
     Returns:
-        Current user
+        Snapshot of the current user (id, username, role, is_active)
 
     Raises:
         HTTPException: If authentication fails
@@ -164,17 +327,46 @@ def get_current_user(
     except JWTError:
         raise HTTPException(status_code=401, detail="Could not validate credentials")
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = _get_cached_user(user_id)
 
     if user is None:
-        raise HTTPException(status_code=401, detail="User not found")
+        row = (await db.execute(_USER_BY_ID, {"uid": user_id})).one_or_none()
+
+        if row is None:
+            raise HTTPException(status_code=401, detail="User not found")
+
+        user = _cache_user(AuthenticatedUser(*row))
 
     if not user.is_active:
         raise HTTPException(status_code=403, detail="User account is inactive")
 
     return user
 
-def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+def _get_cached_user(user_id: str) -> Optional[AuthenticatedUser]:
+    """Return the cached user for user_id, if any"""
+    with _user_cache_lock:
+        return _user_cache.get(user_id)
+
+def _cache_user(user: AuthenticatedUser) -> AuthenticatedUser:
+    """Cache a freshly loaded user snapshot and return it"""
+    with _user_cache_lock:
+        _user_cache[user.id] = user
+    return user
+
+def invalidate_user(user_id: str) -> None:
+    """
+    Drop a user from the authentication cache
+
+    Call this whenever a user's role or active status changes so the
+    next request reloads the row instead of serving stale state.
+
+    Args:
+        user_id: User ID to invalidate
+    """
+    with _user_cache_lock:
+        _user_cache.pop(user_id, None)
+
+def get_current_active_user(current_user: AuthenticatedUser = Depends(get_current_user)) -> AuthenticatedUser:
     """
     Ensure the current user is active
     """
@@ -190,19 +382,17 @@ def require_role(required_role: UserRole):
         @app.delete("/users/{user_id}")
         def delete_user(
             user_id: str,
-            current_user: User = Depends(require_role(UserRole.ADMIN))
+            current_user: AuthenticatedUser = Depends(require_role(UserRole.ADMIN))
         ):
             # Only admins can access this
             pass
     """
-    def role_checker(current_user: User = Depends(get_current_user)) -> User:
-        role_hierarchy = {
-            UserRole.VIEWER: 1,
-            UserRole.USER: 2,
-            UserRole.ADMIN: 3
-        }
+    required_level = required_role.level
 
-        if role_hierarchy.get(current_user.role, 0) < role_hierarchy.get(required_role, 999):
+    def role_checker(current_user: AuthenticatedUser = Depends(get_current_user)) -> AuthenticatedUser:
+        if current_user.role.level < required_level:
+            # The cached role may predate a promotion; reload it on the next request
+            invalidate_user(current_user.id)
             raise HTTPException(
                 status_code=403,
                 detail=f"Requires {required_role.value} role or higher"
@@ -212,37 +402,65 @@ def require_role(required_role: UserRole):
 
     return role_checker
 
-async def authenticate_user_by_id(user_id: str, db: Session = None) -> User:
+async def _load_users_by_ids(user_ids: Sequence[str], db: Optional[AsyncSession] = None) -> Dict[str, AuthenticatedUser]:
+    """Load users (active or not) from the user cache, fetching all misses in one query"""
+    users: Dict[str, AuthenticatedUser] = {}
+    missing = []
+    for user_id in dict.fromkeys(user_ids):
+        user = _get_cached_user(user_id)
+        if user is not None:
+            users[user_id] = user
+        else:
+            missing.append(user_id)
+
+    if missing:
+        if db is None:
+            async with AsyncSessionLocal() as session:
+                return {**users, **await _load_users_by_ids(missing, session)}
+
+        result = await db.execute(_USERS_BY_IDS, {"uids": missing})
+        for row in result:
+            user = _cache_user(AuthenticatedUser(*row))
+            users[user.id] = user
+
+    return users
+
+async def authenticate_users_by_ids(user_ids: Sequence[str], db: Optional[AsyncSession] = None) -> Dict[str, AuthenticatedUser]:
+    """
+    Authenticate many users by ID with a single database round-trip
+    Cached users are served from the same user cache as get_current_user
+
+    Args:
+        user_ids: User IDs to resolve
+        db: Async database session (a short-lived one is opened if omitted)
+
+    Returns:
+        Mapping of user ID to AuthenticatedUser for every ID that exists and is active
+    """
+    users = await _load_users_by_ids(user_ids, db)
+    return {user_id: user for user_id, user in users.items() if user.is_active}
+
+async def authenticate_user_by_id(user_id: str, db: Optional[AsyncSession] = None) -> AuthenticatedUser:
     """
     Authenticate user by ID (for backward compatibility with existing code)
+    Delegates to the batch lookup used by authenticate_users_by_ids
 
     Args:
         user_id: User ID
-        db: Database session
+        db: Async database session
 
     Returns:
-        User object
+        AuthenticatedUser snapshot
 
     Raises:
         HTTPException: If user not found
     """
-    if db is None:
-        from database.session import SessionLocal
-        db = SessionLocal()
-        close_db = True
-    else:
-        close_db = False
+    user = (await _load_users_by_ids([user_id], db)).get(user_id)
 
-    try:
-        user = db.query(User).filter(User.id == user_id).first()
-
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
 
-        if not user.is_active:
-            raise HTTPException(status_code=403, detail="User account is inactive")
+    if not user.is_active:
+        raise HTTPException(status_code=403, detail="User account is inactive")
 
-        return user
-    finally:
-        if close_db:
-            db.close()
+    return user
@@ -0,0 +1,113 @@
+"""
+Common Password Lists
+Compact membership tests for large common-password lists (100k+ entries)
+"""
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Iterator
+import hashlib
+import logging
+import math
+
+
+def _digest(password: str) -> bytes:
+    """128-bit digest of a password, shared by the Bloom filter and the exact check"""
+    return hashlib.blake2b(password.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over 128-bit digests
+
+    Probe positions come from double hashing the two 64-bit halves of the
+    digest, so a lookup costs one hash plus at most hash_count bit tests
+    (usually one or two for non-members).
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        """
+        Args:
+            capacity: Expected number of entries
+            error_rate: Target false-positive rate at capacity
+        """
+        capacity = max(capacity, 1)
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _probes(self, digest: bytes) -> Iterator[int]:
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, digest: bytes) -> None:
+        """Add a digest to the filter"""
+        for bit in self._probes(digest):
+            self._bits[bit >> 3] |= 1 << (bit & 7)
+
+    def __contains__(self, digest: bytes) -> bool:
+        bits = self._bits
+        for bit in self._probes(digest):
+            if not bits[bit >> 3] & (1 << (bit & 7)):
+                return False
+        return True
+
+
+class CommonPasswordList:
+    """
+    Membership test for a large list of common passwords
+
+    A Bloom filter rejects most non-members cheaply; possible members are
+    confirmed against a sorted array of 64-bit password digests. The whole
+    list costs roughly 9-10 bytes per entry instead of a Python set of strings.
+
+    Usage:
+        common = CommonPasswordList.from_file("common_passwords.txt")
+        if password.lower() in common:
+            ...
+    """
+
+    def __init__(self, passwords: Iterable[str], error_rate: float = 0.01):
+        """
+        Args:
+            passwords: Passwords to include (matched exactly; lower-case them for case-insensitive checks)
+            error_rate: Bloom filter false-positive rate (only affects speed, never correctness)
+        """
+        digests = {_digest(password) for password in passwords}
+
+        self._bloom = BloomFilter(len(digests), error_rate)
+        for digest in digests:
+            self._bloom.add(digest)
+
+        self._exact = array('Q', sorted(int.from_bytes(digest[:8], 'little') for digest in digests))
+
+    @classmethod
+    def from_file(cls, path: str, error_rate: float = 0.01) -> "CommonPasswordList":
+        """
+        Load a newline-delimited password list, lower-casing every entry
+
+        Args:
+            path: Path to the list (one password per line, UTF-8)
+            error_rate: Bloom filter false-positive rate
+
+        Returns:
+            CommonPasswordList
+        """
+        with open(path, encoding='utf-8', errors='ignore') as f:
+            common = cls((line.strip().lower() for line in f if line.strip()), error_rate)
+
+        logging.info(f"Loaded {len(common)} common passwords from {path}")
+        return common
+
+    def __len__(self) -> int:
+        return len(self._exact)
+
+    def __contains__(self, password: str) -> bool:
+        digest = _digest(password)
+        if digest not in self._bloom:
+            return False
+
+        key = int.from_bytes(digest[:8], 'little')
+        i = bisect_left(self._exact, key)
+        return i < len(self._exact) and self._exact[i] == key
@@ -1,16 +1,24 @@
 """
 Encrypted Credential Management
-Securely store and retrieve cloud provider credentials using Fernet encryption
+Securely store and retrieve cloud provider credentials using AES-256-GCM encryption
 """
+from cachetools import TTLCache
 from cryptography.fernet import Fernet
-from typing import Dict, Any, Optional
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from datetime import datetime
+from typing import Dict, Any, Optional, Tuple
+from sqlalchemy import case, func, select
 from sqlalchemy.orm import Session
-import json
+import base64
+import orjson
 import os
 import logging
+import threading
 
-from database.models import Credential, CloudProvider
-from database.session import get_db, SessionLocal
+from database.models import Credential, CloudProvider, User
+from database.session import get_db, SessionLocal, DeferredTimestampWriter
 
 # Get encryption key from environment
 ENCRYPTION_KEY = os.getenv("ENCRYPTION_KEY")
@@ -24,9 +32,92 @@ if not ENCRYPTION_KEY:
         "Store this key securely in your environment configuration."
     )
 
-# Initialize Fernet cipher
+# Fernet cipher, kept to decrypt credentials stored before the switch to AES-GCM
 fernet = Fernet(ENCRYPTION_KEY.encode() if isinstance(ENCRYPTION_KEY, str) else ENCRYPTION_KEY)
 
+# AES-256-GCM cipher keyed by HKDF over ENCRYPTION_KEY, so the raw key is never shared with Fernet
+_aesgcm = AESGCM(HKDF(
+    algorithm=hashes.SHA256(),
+    length=32,
+    salt=None,
+    info=b"terraflux-credentials-aesgcm-v1",
+).derive(base64.urlsafe_b64decode(ENCRYPTION_KEY)))
+
+# Leading byte of the decoded ciphertext; Fernet tokens always start with 0x80
+AESGCM_VERSION = b"\x01"
+FERNET_VERSION = 0x80
+NONCE_SIZE = 12
+
+# Leading byte of the plaintext naming its serialization; legacy plaintexts are bare JSON objects
+PAYLOAD_ORJSON = b"\x01"
+
+# Decrypted credentials keyed by (user_id, provider, credential_id); credential_id is None for the default
+# Entries hold (credential row id, credentials version, decrypted dict) and are copied on read so callers
+# can't mutate the cache. invalidate_user_credentials only reaches this process (the MCP server runs in
+# another one), so every hit is checked against the user's current credentials version before use;
+# the cache saves the decryption and default resolution, not the database round-trip.
+CREDENTIAL_CACHE_TTL_SECONDS = int(os.getenv("CREDENTIAL_CACHE_TTL_SECONDS", "300"))
+_cred_cache: TTLCache = TTLCache(maxsize=1024, ttl=CREDENTIAL_CACHE_TTL_SECONDS)
+_cred_cache_lock = threading.Lock()
+
+# last_used is bookkeeping only; batch it off the lookup path
+last_used_writer = DeferredTimestampWriter(Credential, "last_used")
+
+def _get_default_credentials(db: Session, user_id: str) -> Dict[str, Optional[str]]:
+    """Fetch a user's {provider value: default credential_id} mapping"""
+    return db.query(User.default_credentials).filter(User.id == user_id).scalar() or {}
+
+def _set_default_credential(db: Session, user_id: str, provider: CloudProvider, credential_id: Optional[str]) -> None:
+    """Point a user's default for a provider at credential_id (None clears it)"""
+    # Lock the row (and re-read the map) so concurrent writes for other providers aren't lost
+    user = db.get(User, user_id, with_for_update=True, populate_existing=True)
+    if user is None:
+        raise ValueError(f"User {user_id} not found")
+    # Reassign rather than mutate in place so the JSON change is detected
+    user.default_credentials = {**(user.default_credentials or {}), provider.value: credential_id}
+
+def _credentials_version(db: Session, user_id: str, credential_row_id: Optional[str] = None) -> Tuple[Any, ...]:
+    """
+    Fingerprint of a user's credentials, used to validate cache hits across processes
+
+    Covers the number of (active) rows and the default mapping, which decide which credential
+    a lookup resolves to, plus the ciphertext of credential_row_id if it is still active, which
+    changes on every rotation (AES-GCM nonces are random). updated_at is deliberately left out:
+    last_used bookkeeping bumps it through onupdate.
+
+    Args:
+        db: Database session
+        user_id: User ID
+        credential_row_id: Cached credential row to check (None to skip)
+
+    Returns:
+        (row count, active row count, default mapping, ciphertext or None)
+
+    Raises:
+        ValueError: If the user does not exist
+    """
+    user_rows = Credential.user_id == User.id
+    row = db.query(
+        select(func.count(Credential.id)).where(user_rows).scalar_subquery(),
+        select(func.sum(case((Credential.is_active == True, 1), else_=0))).where(user_rows).scalar_subquery(),
+        User.default_credentials,
+        select(Credential.encrypted_data).where(
+            Credential.id == credential_row_id,
+            Credential.is_active == True,
+            user_rows
+        ).scalar_subquery()
+    ).filter(User.id == user_id).one_or_none()
+
+    if row is None:
+        raise ValueError(f"User {user_id} not found")
+    return tuple(row)
+
+def invalidate_user_credentials(user_id: str) -> None:
+    """Drop every cached credential for a user (call after any credential write)"""
+    with _cred_cache_lock:
+        for key in [key for key in _cred_cache if key[0] == user_id]:
+            _cred_cache.pop(key, None)
+
 def encrypt_credentials(credentials: Dict[str, Any]) -> str:
     """
     Encrypt credentials dictionary to encrypted string
@@ -36,16 +127,17 @@ def encrypt_credentials(credentials: Dict[str, Any]) -> str:
                     e.g., {"aws_access_key": "AKIA...", "aws_secret_key": "..."}
 
     Returns:
-        Encrypted string
+        Encrypted string (urlsafe base64 of version byte + nonce + ciphertext)
     """
     try:
-        # Convert to JSON
-        json_data = json.dumps(credentials)
+        # Serialize, tagged with the payload format
+        payload = PAYLOAD_ORJSON + orjson.dumps(credentials)
 
-        # Encrypt
-        encrypted = fernet.encrypt(json_data.encode())
+        # Encrypt and authenticate in a single AEAD pass, binding the version byte
+        nonce = os.urandom(NONCE_SIZE)
+        encrypted = _aesgcm.encrypt(nonce, payload, AESGCM_VERSION)
 
-        return encrypted.decode()
+        return base64.urlsafe_b64encode(AESGCM_VERSION + nonce + encrypted).decode()
 
     except Exception as e:
         logging.error(f"Error encrypting credentials: {e}")
@@ -65,11 +157,21 @@ def decrypt_credentials(encrypted_data: str) -> Dict[str, Any]:
         ValueError: If decryption fails
     """
     try:
-        # Decrypt
-        decrypted = fernet.decrypt(encrypted_data.encode())
+        raw = base64.urlsafe_b64decode(encrypted_data)
+
+        # Decrypt, falling back to Fernet for legacy ciphertexts
+        if raw[0] == FERNET_VERSION:
+            decrypted = fernet.decrypt(encrypted_data.encode())
+        elif raw[:1] == AESGCM_VERSION:
+            nonce = raw[1:1 + NONCE_SIZE]
+            decrypted = _aesgcm.decrypt(nonce, raw[1 + NONCE_SIZE:], AESGCM_VERSION)
+        else:
+            raise ValueError(f"Unknown ciphertext version: {raw[0]:#x}")
 
-        # Parse JSON
-        credentials = json.loads(decrypted.decode())
+        # Parse the payload (untagged legacy plaintexts are plain JSON)
+        if decrypted[:1] == PAYLOAD_ORJSON:
+            decrypted = decrypted[1:]
+        credentials = orjson.loads(decrypted)
 
         return credentials
 
@@ -111,14 +213,6 @@ async def store_user_credentials(
         # Encrypt credentials
         encrypted_data = encrypt_credentials(credentials)
 
-        # If setting as default, unset other defaults for this provider
-        if is_default:
-            db.query(Credential).filter(
-                Credential.user_id == user_id,
-                Credential.provider == provider,
-                Credential.is_default == True
-            ).update({"is_default": False})
-
         # Create credential record
         credential = Credential(
             user_id=user_id,
@@ -130,8 +224,15 @@ async def store_user_credentials(
         )
 
         db.add(credential)
+
+        # If setting as default, repoint the user's default for this provider (one row written)
+        if is_default:
+            db.flush()
+            _set_default_credential(db, user_id, provider, credential.id)
+
         db.commit()
         db.refresh(credential)
+        invalidate_user_credentials(user_id)
 
         logging.info(f"Stored credentials for user {user_id}, provider {provider.value}")
 
@@ -173,6 +274,19 @@ async def get_user_credentials(
         close_db = True
 
     try:
+        cache_key = (user_id, provider, credential_id)
+        with _cred_cache_lock:
+            cached: Optional[Tuple[str, Tuple[Any, ...], Dict[str, Any]]] = _cred_cache.get(cache_key)
+
+        if cached is not None:
+            cached_id, cached_version, decrypted = cached
+            if _credentials_version(db, user_id, cached_id) == cached_version:
+                last_used_writer.record(cached_id, datetime.utcnow())
+                return dict(decrypted)
+
+        # Taken before resolving, so a concurrent write makes the stored version stale rather than the data
+        version = _credentials_version(db, user_id)
+
         # Query for credentials
         query = db.query(Credential).filter(
             Credential.user_id == user_id,
@@ -183,20 +297,29 @@ async def get_user_credentials(
         if credential_id:
             credential = query.filter(Credential.id == credential_id).first()
         else:
-            # Get default credentials
-            credential = query.filter(Credential.is_default == True).first()
-
-            # If no default, get the most recent one
-            if not credential:
-                credential = query.order_by(Credential.created_at.desc()).first()
+            # The default mapping was already fetched as part of the version
+            defaults = version[2] or {}
+            if provider.value in defaults:
+                # The mapped default if it is still active, otherwise the most recent
+                default_id = defaults[provider.value]
+                credential = query.filter(Credential.id == default_id).first() if default_id else None
+                if not credential:
+                    credential = query.order_by(Credential.created_at.desc()).first()
+            else:
+                # No mapping yet (credentials stored before it existed): fall back to the stored flag
+                credential = query.order_by(
+                    Credential.is_default.desc(),
+                    Credential.created_at.desc()
+                ).first()
 
         if not credential:
             raise ValueError(f"No credentials found for user {user_id} and provider {provider.value}")
 
         # Update last used timestamp
-        from datetime import datetime
-        credential.last_used = datetime.utcnow()
-        db.commit()
+        now = datetime.utcnow()
+        if not last_used_writer.record(credential.id, now):
+            credential.last_used = now
+            db.commit()
 
         # Decrypt and return
         decrypted = decrypt_credentials(credential.encrypted_data)
@@ -205,7 +328,10 @@ async def get_user_credentials(
         if credential.region:
             decrypted['region'] = credential.region
 
-        return decrypted
+        with _cred_cache_lock:
+            _cred_cache[cache_key] = (credential.id, version[:-1] + (credential.encrypted_data,), decrypted)
+
+        return dict(decrypted)
 
     finally:
         if close_db:
@@ -250,11 +376,11 @@ async def update_user_credentials(
         encrypted_data = encrypt_credentials(credentials)
 
         credential.encrypted_data = encrypted_data
-        from datetime import datetime
         credential.updated_at = datetime.utcnow()
 
         db.commit()
         db.refresh(credential)
+        invalidate_user_credentials(user_id)
 
         logging.info(f"Updated credentials {credential_id} for user {user_id}")
 
@@ -294,18 +420,23 @@ async def delete_user_credentials(
         close_db = True
 
     try:
-        credential = db.query(Credential).filter(
+        # Soft delete - just mark as inactive, in a single UPDATE with no ORM pre-select
+        # (synchronize_session=False: Credential objects already in this session keep is_active=True)
+        updated = db.query(Credential).filter(
             Credential.id == credential_id,
             Credential.user_id == user_id
-        ).first()
+        ).update({"is_active": False}, synchronize_session=False)
 
-        if not credential:
+        if not updated:
             raise ValueError("Credential not found or unauthorized")
 
-        # Soft delete - just mark as inactive
-        credential.is_active = False
+        # Clear the default mapping if it pointed here
+        for provider_value, default_id in _get_default_credentials(db, user_id).items():
+            if default_id == credential_id:
+                _set_default_credential(db, user_id, CloudProvider(provider_value), None)
 
         db.commit()
+        invalidate_user_credentials(user_id)
 
         logging.info(f"Deleted credentials {credential_id} for user {user_id}")
 
@@ -351,6 +482,7 @@ async def list_user_credentials(
             query = query.filter(Credential.provider == provider)
 
         credentials = query.order_by(Credential.created_at.desc()).all()
+        defaults = _get_default_credentials(db, user_id)
 
         # Return metadata without encrypted data
         return [
@@ -358,7 +490,10 @@ async def list_user_credentials(
                 "id": cred.id,
                 "provider": cred.provider.value,
                 "region": cred.region,
-                "is_default": cred.is_default,
+                "is_default": (
+                    defaults[cred.provider.value] == cred.id
+                    if cred.provider.value in defaults else cred.is_default
+                ),
                 "created_at": cred.created_at.isoformat(),
                 "last_used": cred.last_used.isoformat() if cred.last_used else None
             }
@@ -371,13 +506,13 @@ async def list_user_credentials(
 
 def generate_encryption_key() -> str:
     """
-    Generate a new Fernet encryption key
+    Generate a new 256-bit encryption key
 
     Returns:
         Base64-encoded encryption key (use in .env as ENCRYPTION_KEY)
     """
-    key = Fernet.generate_key()
-    return key.decode()
+    key = AESGCM.generate_key(bit_length=256)
+    return base64.urlsafe_b64encode(key).decode()
 
 # For backward compatibility with existing code
 async def get_user_credentials_legacy(user_id: str) -> Dict[str, Any]:
@@ -2,11 +2,17 @@
 CSRF Protection
 Simple CSRF token generation and validation for state-changing operations
 """
-from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
+from cachetools import TTLCache
 from fastapi import HTTPException, Header
-from typing import Optional
+from typing import Optional, Tuple
+import base64
+import hashlib
+import hmac
 import os
+import re
 import logging
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -15,12 +21,25 @@ SECRET_KEY = os.getenv("SECRET_KEY", "")
 if not SECRET_KEY:
     raise ValueError("SECRET_KEY must be set for CSRF protection")
 
-# Initialize serializer
-serializer = URLSafeTimedSerializer(SECRET_KEY, salt="csrf-protection")
+# Pre-keyed HMAC-SHA256 with the salt already absorbed; copied for every sign/verify
+# The salt keeps CSRF signatures distinct from anything else signed with SECRET_KEY
+_HMAC_TEMPLATE = hmac.new(SECRET_KEY.encode(), b"csrf-protection|", hashlib.sha256)
+
+# Truncated signature length (bytes)
+CSRF_SIGNATURE_SIZE = 16
 
 # Token expiration time (in seconds)
 CSRF_TOKEN_EXPIRATION = 3600  # 1 hour
 
+# Shape of a token from generate_csrf_token: b64(payload).b64(16-byte signature)
+# Anything else is rejected before hashing, caching or logging
+_CSRF_TOKEN_RE = re.compile(r"[A-Za-z0-9_-]{8,512}\.[A-Za-z0-9_-]{22}")
+
+# Verified tokens keyed by a digest of the token, holding (bound user_id, issued_at)
+# Repeat validations within the TTL skip the HMAC check and timestamp parsing
+_csrf_cache: TTLCache = TTLCache(maxsize=8192, ttl=60)
+_csrf_cache_lock = threading.Lock()
+
 
 def generate_csrf_token(user_id: str) -> str:
     """
@@ -30,9 +49,50 @@ def generate_csrf_token(user_id: str) -> str:
         user_id: User ID to tie token to
 
     Returns:
-        Signed CSRF token
+        Signed CSRF token: b64(user_id|issued_at).b64(signature)
     """
-    return serializer.dumps(user_id)
+    payload = f"{user_id}|{int(time.time())}".encode()
+    return (_b64encode(payload) + b"." + _b64encode(_sign(payload))).decode()
+
+
+def _sign(payload: bytes) -> bytes:
+    """Sign a token payload with the pre-keyed HMAC"""
+    mac = _HMAC_TEMPLATE.copy()
+    mac.update(payload)
+    return mac.digest()[:CSRF_SIGNATURE_SIZE]
+
+
+def _b64encode(data: bytes) -> bytes:
+    """URL-safe base64 without padding"""
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _b64decode(data: bytes) -> bytes:
+    """Inverse of _b64encode"""
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+
+def _load_csrf_token(token: str, max_age: int) -> Tuple[str, float]:
+    """
+    Verify a token's signature and age
+
+    Returns:
+        (bound user_id, issued_at timestamp)
+
+    Raises:
+        ValueError: If the token is malformed, forged or expired
+    """
+    encoded_payload, _, encoded_signature = token.encode().partition(b".")
+    payload = _b64decode(encoded_payload)
+    if not hmac.compare_digest(_b64decode(encoded_signature), _sign(payload)):
+        raise ValueError("signature does not match")
+
+    token_user_id, _, issued = payload.decode().rpartition("|")
+    issued_at = float(int(issued))
+    if time.time() - issued_at > max_age:
+        raise ValueError("token expired")
+
+    return token_user_id, issued_at
 
 
 def validate_csrf_token(token: str, user_id: str, max_age: int = CSRF_TOKEN_EXPIRATION) -> bool:
@@ -47,10 +107,24 @@ def validate_csrf_token(token: str, user_id: str, max_age: int = CSRF_TOKEN_EXPI
     Returns:
         True if valid, False otherwise
     """
+    if not _CSRF_TOKEN_RE.fullmatch(token):
+        return False
+
     try:
-        token_user_id = serializer.loads(token, max_age=max_age)
-        return token_user_id == user_id
-    except (BadSignature, SignatureExpired) as e:
+        cache_key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+        with _csrf_cache_lock:
+            cached: Optional[Tuple[str, float]] = _csrf_cache.get(cache_key)
+
+        if cached is None:
+            cached = _load_csrf_token(token, max_age)
+            with _csrf_cache_lock:
+                _csrf_cache[cache_key] = cached
+        elif time.time() - cached[1] > max_age:
+            logger.warning("CSRF token validation failed: token expired")
+            return False
+
+        return hmac.compare_digest(cached[0].encode(), user_id.encode())
+    except ValueError as e:
         logger.warning(f"CSRF token validation failed: {e}")
         return False
     except Exception as e:
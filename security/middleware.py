@@ -2,12 +2,15 @@
 Security Middleware
 Implements various security measures for FastAPI application
 """
+from starlette.exceptions import HTTPException as StarletteHTTPException
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
 from starlette.responses import Response, JSONResponse
 from fastapi import status
+import asyncio
 import os
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -17,31 +20,39 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
     Add security headers to all responses
     """
 
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
+    def __init__(self, app):
+        super().__init__(app)
 
-        # Security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        response.headers["Permissions-Policy"] = "geolocation=(), microphone=(), camera=()"
+        # Built once: the same encoded headers are appended to every response
+        self._headers: list[tuple[bytes, bytes]] = [
+            (b"x-content-type-options", b"nosniff"),
+            (b"x-frame-options", b"DENY"),
+            (b"x-xss-protection", b"1; mode=block"),
+            (b"referrer-policy", b"strict-origin-when-cross-origin"),
+            (b"permissions-policy", b"geolocation=(), microphone=(), camera=()"),
+        ]
 
         # HSTS - only in production with HTTPS
         if os.getenv("ENVIRONMENT") == "production":
-            response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains; preload"
+            self._headers.append(
+                (b"strict-transport-security", b"max-age=31536000; includeSubDomains; preload")
+            )
 
         # Content Security Policy
-        response.headers["Content-Security-Policy"] = (
-            "default-src 'self'; "
-            "script-src 'self' 'unsafe-inline' 'unsafe-eval'; "
-            "style-src 'self' 'unsafe-inline'; "
-            "img-src 'self' data: https:; "
-            "font-src 'self' data:; "
-            "connect-src 'self'; "
-            "frame-ancestors 'none';"
-        )
+        self._headers.append((
+            b"content-security-policy",
+            b"default-src 'self'; "
+            b"script-src 'self' 'unsafe-inline' 'unsafe-eval'; "
+            b"style-src 'self' 'unsafe-inline'; "
+            b"img-src 'self' data: https:; "
+            b"font-src 'self' data:; "
+            b"connect-src 'self'; "
+            b"frame-ancestors 'none';"
+        ))
 
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        response.raw_headers.extend(self._headers)
         return response
 
 
@@ -53,17 +64,20 @@ class RequestSizeLimitMiddleware(BaseHTTPMiddleware):
     def __init__(self, app, max_request_size: int = 10 * 1024 * 1024):  # 10MB default
         super().__init__(app)
         self.max_request_size = max_request_size
+        self._too_large_detail = f"Request body too large. Maximum size: {max_request_size / 1024 / 1024:.1f}MB"
 
     async def dispatch(self, request: Request, call_next):
-        if request.method in ["POST", "PUT", "PATCH"]:
-            content_length = request.headers.get("content-length")
-            if content_length and int(content_length) > self.max_request_size:
-                return JSONResponse(
-                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                    content={
-                        "detail": f"Request body too large. Maximum size: {self.max_request_size / 1024 / 1024:.1f}MB"
-                    }
-                )
+        # POST, PUT and PATCH are the only standard methods starting with "P"
+        if request.scope["method"][0] == "P":
+            # Scan the raw ASGI headers (names are lower-cased bytes) instead of building Headers
+            for name, value in request.scope["headers"]:
+                if name == b"content-length":
+                    if int(value) > self.max_request_size:
+                        return JSONResponse(
+                            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            content={"detail": self._too_large_detail}
+                        )
+                    break
 
         response = await call_next(request)
         return response
@@ -79,8 +93,16 @@ class SecureErrorHandlingMiddleware(BaseHTTPMiddleware):
         try:
             response = await call_next(request)
             return response
+        except StarletteHTTPException as exc:
+            # Route/dependency HTTPExceptions are already responses by now; only ones raised
+            # by an inner middleware reach here. They are intentional, so answer as-is without logging
+            return JSONResponse(
+                status_code=exc.status_code,
+                content={"detail": exc.detail},
+                headers=exc.headers
+            )
         except Exception as e:
-            # Log detailed error internally
+            # Log detailed error internally (timeouts carry no useful traceback)
             logger.error(
                 f"Unhandled exception: {type(e).__name__}: {str(e)}",
                 extra={
@@ -88,7 +110,7 @@ class SecureErrorHandlingMiddleware(BaseHTTPMiddleware):
                     "method": request.method,
                     "client_ip": request.client.host if request.client else "unknown"
                 },
-                exc_info=True
+                exc_info=not isinstance(e, (TimeoutError, asyncio.TimeoutError))
             )
 
             # Return generic error to user
@@ -108,34 +130,30 @@ class AuditLoggingMiddleware(BaseHTTPMiddleware):
 
     async def dispatch(self, request: Request, call_next):
         # Extract client information
-        client_ip = request.client.host if request.client else "unknown"
-        user_agent = request.headers.get("user-agent", "unknown")
-        path = request.url.path
         method = request.method
+        path = request.url.path
+        extra = {
+            "client_ip": request.client.host if request.client else "unknown",
+            "user_agent": request.headers.get("user-agent", "unknown"),
+            "method": method,
+            "path": path,
+        }
 
-        # Log request
-        logger.info(
-            f"Request: {method} {path}",
-            extra={
-                "client_ip": client_ip,
-                "user_agent": user_agent,
-                "method": method,
-                "path": path,
-            }
-        )
+        # Log request arrival only when debugging; the response record carries everything else
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Request: %s %s", method, path, extra=extra)
 
         # Process request
+        start = time.perf_counter()
         response = await call_next(request)
 
-        # Log response
-        logger.info(
-            f"Response: {method} {path} -> {response.status_code}",
-            extra={
-                "client_ip": client_ip,
-                "status_code": response.status_code,
-                "method": method,
-                "path": path,
-            }
-        )
+        # Log request and response as a single record
+        if logger.isEnabledFor(logging.INFO):
+            duration_ms = (time.perf_counter() - start) * 1000
+            extra["status_code"] = response.status_code
+            extra["duration_ms"] = duration_ms
+            logger.info(
+                "%s %s -> %d (%.1fms)", method, path, response.status_code, duration_ms, extra=extra
+            )
 
         return response
@@ -2,20 +2,114 @@
 Password Strength Validation
 Enforces strong password requirements
 """
+import os
 import re
-from typing import Tuple, List
+import string
+import unicodedata
+from itertools import repeat
+from typing import Optional, Sequence, Tuple, List
+
+from security.common_passwords import CommonPasswordList
+
+# Character-class bits collected by the single-pass scan in validate()
+_UPPER = 0x1
+_LOWER = 0x2
+_DIGIT = 0x4
+_SPECIAL = 0x8
+
+# Characters that satisfy the special-character requirement (all ASCII, so the byte table covers them)
+_SPECIALS = frozenset('!@#$%^&*(),.?":{}|<>_-+=[]\\;/~`')
+
+
+def _build_class_table() -> bytes:
+    """Map every byte value to the bitmask of character classes it belongs to"""
+    table = bytearray(256)
+    for chars, bit in (
+        (string.ascii_uppercase, _UPPER),
+        (string.ascii_lowercase, _LOWER),
+        (string.digits, _DIGIT),
+        (_SPECIALS, _SPECIAL),
+    ):
+        for c in chars:
+            table[ord(c)] |= bit
+    return bytes(table)
+
+
+_CLASS = _build_class_table()
+
+# \d also matches non-ASCII digits, which the byte table cannot see
+_RE_DIGIT = re.compile(r'\d')
+
+
+# Common weak passwords to reject
+_COMMON_PASSWORDS = frozenset({
+    'password', 'password123', 'password1', '12345678', 'qwerty123',
+    'admin123', 'welcome123', 'abc123456', 'letmein123', 'monkey123',
+    'iloveyou', 'trustno1', 'dragon123', 'master123', 'sunshine',
+    'password1234', 'admin1234', 'qwerty1234', 'welcome1234'
+})
+
+# Optional large common-password list (one per line), checked in addition to the built-in set
+COMMON_PASSWORDS_FILE = os.getenv("COMMON_PASSWORDS_FILE")
+_COMMON_PASSWORD_LIST: Optional[CommonPasswordList] = (
+    CommonPasswordList.from_file(COMMON_PASSWORDS_FILE) if COMMON_PASSWORDS_FILE else None
+)
+
+
+def _build_sequence_key_table() -> bytes:
+    """
+    Map every byte value to its position for sequence detection
+
+    Digits and letters (case-folded) land in disjoint ranges, so consecutive
+    keys differ by exactly 1 only within '0'-'9' or within 'a'-'z'; every
+    other byte maps to 0, which breaks a run.
+    """
+    table = bytearray(256)
+    for c in string.digits:
+        table[ord(c)] = ord(c)
+    for c in string.ascii_lowercase:
+        table[ord(c)] = table[ord(c.upper())] = ord(c) + 64
+    return bytes(table)
+
+
+_SEQUENCE_KEY = _build_sequence_key_table()
+
+
+def _build_run_class_table() -> bytes:
+    """Collapse every byte to its run class: digits -> '0', letters -> 'a', anything else -> ' '"""
+    table = bytearray(b' ' * 256)
+    for c in string.digits:
+        table[ord(c)] = ord('0')
+    for c in string.ascii_letters:
+        table[ord(c)] = ord('a')
+    return bytes(table)
+
+
+_RUN_CLASS = _build_run_class_table()
+
+
+def _has_ascii_sequence(keys: bytes, threshold: int) -> bool:
+    """Run-length scan for ascending/descending runs over _SEQUENCE_KEY-translated bytes"""
+    run_up = run_down = 0
+    prev = -2
+    for key in keys:
+        if not key:
+            prev = -2
+            continue
+        step = key - prev
+        run_up = run_up + 1 if step == 1 else 1
+        run_down = run_down + 1 if step == -1 else 1
+        if run_up >= threshold or run_down >= threshold:
+            return True
+        prev = key
+    return False
 
 
 class PasswordValidator:
     """Validate password strength and enforce security policies"""
 
-    # Common weak passwords to reject
-    COMMON_PASSWORDS = {
-        'password', 'password123', 'password1', '12345678', 'qwerty123',
-        'admin123', 'welcome123', 'abc123456', 'letmein123', 'monkey123',
-        'iloveyou', 'trustno1', 'dragon123', 'master123', 'sunshine',
-        'password1234', 'admin1234', 'qwerty1234', 'welcome1234'
-    }
+    # Common weak passwords to reject (kept for callers that read the class attribute)
+    COMMON_PASSWORDS = _COMMON_PASSWORDS
 
     def __init__(
         self,
@@ -27,6 +121,7 @@ class PasswordValidator:
     ):
         """
         Initialize password validator
+        Requirements are resolved here; changing the require_* attributes later has no effect
 
         Args:
             min_length: Minimum password length
@@ -41,13 +136,30 @@ class PasswordValidator:
         self.require_digit = require_digit
         self.require_special = require_special
 
-    def validate(self, password: str, username: str = None) -> Tuple[bool, str]:
+        # Character-class requirements resolved once: validate() only checks the enabled ones
+        self._class_requirements: List[Tuple[int, str]] = [
+            (bit, message)
+            for bit, message, required in (
+                (_UPPER, "Password must contain at least one uppercase letter", require_uppercase),
+                (_LOWER, "Password must contain at least one lowercase letter", require_lowercase),
+                (_DIGIT, "Password must contain at least one number", require_digit),
+                (_SPECIAL, "Password must contain at least one special character", require_special),
+            )
+            if required
+        ]
+        self._required_classes = 0
+        for bit, _ in self._class_requirements:
+            self._required_classes |= bit
+
+    def validate(self, password: str, username: str = None, fast_fail: bool = False) -> Tuple[bool, str]:
         """
         Validate password strength
 
         Args:
             password: Password to validate
             username: Optional username to check similarity
+            fast_fail: Stop at the first failure instead of collecting every error
+                       (for bulk "is it valid?" checks; the message is then the first error only)
 
         Returns:
             Tuple of (is_valid, error_message)
@@ -58,36 +170,53 @@ class PasswordValidator:
         # Check minimum length
         if len(password) < self.min_length:
             errors.append(f"Password must be at least {self.min_length} characters long")
-
-        # Check uppercase requirement
-        if self.require_uppercase and not re.search(r'[A-Z]', password):
-            errors.append("Password must contain at least one uppercase letter")
-
-        # Check lowercase requirement
-        if self.require_lowercase and not re.search(r'[a-z]', password):
-            errors.append("Password must contain at least one lowercase letter")
-
-        # Check digit requirement
-        if self.require_digit and not re.search(r'\d', password):
-            errors.append("Password must contain at least one number")
-
-        # Check special character requirement
-        if self.require_special and not re.search(r'[!@#$%^&*(),.?":{}|<>_\-+=\[\]\\;/~`]', password):
-            errors.append("Password must contain at least one special character")
+            if fast_fail:
+                return False, errors[0]
+
+        # Lower-cased once and shared by the common-password, username and sequence checks
+        pw_lower = password.lower()
+
+        # Collect the required character classes in one pass, stopping once all have been seen
+        required = self._required_classes
+        seen = 0
+        if required:
+            for b in password.encode('utf-8', 'ignore'):
+                seen |= _CLASS[b]
+                if seen & required == required:
+                    break
+            if required & _DIGIT and not seen & _DIGIT and not password.isascii() and _RE_DIGIT.search(password):
+                seen |= _DIGIT
+
+        # Check character-class requirements
+        for bit, message in self._class_requirements:
+            if not seen & bit:
+                errors.append(message)
+
+        if fast_fail and errors:
+            return False, errors[0]
 
         # Check against common passwords
-        if password.lower() in self.COMMON_PASSWORDS:
+        if pw_lower in _COMMON_PASSWORDS or (
+            _COMMON_PASSWORD_LIST is not None and pw_lower in _COMMON_PASSWORD_LIST
+        ):
             errors.append("Password is too common. Please choose a stronger password")
 
-        # Check password doesn't contain username
-        if username and len(username) >= 3:
-            if username.lower() in password.lower():
+        # Check password doesn't contain username (skipped when it is too short to
+        # matter or longer than the password; lower() never shortens a string)
+        if username and 3 <= len(username) <= len(pw_lower):
+            if username.lower() in pw_lower:
                 errors.append("Password cannot contain your username")
 
+        if fast_fail and errors:
+            return False, errors[0]
+
         # Check for sequential characters (123, abc, etc.)
-        if self._has_sequential_chars(password):
+        if self._has_sequential_chars(pw_lower, already_lowered=True):
             errors.append("Password contains sequential characters. Please choose a more complex password")
 
+        if fast_fail and errors:
+            return False, errors[0]
+
         # Check for repeated characters (aaa, 111, etc.)
         if self._has_repeated_chars(password):
             errors.append("Password contains too many repeated characters")
@@ -97,40 +226,80 @@ class PasswordValidator:
 
         return True, ""
 
-    def _has_sequential_chars(self, password: str, threshold: int = 4) -> bool:
+    def validate_many(
+        self,
+        passwords: Sequence[str],
+        usernames: Optional[Sequence[Optional[str]]] = None,
+        fast_fail: bool = False
+    ) -> List[Tuple[bool, str]]:
+        """
+        Validate many passwords in one call (bulk user imports, password audits)
+
+        Args:
+            passwords: Passwords to validate
+            usernames: Optional usernames, one per password
+            fast_fail: Stop at the first failure per password (see validate)
+
+        Returns:
+            One (is_valid, error_message) tuple per password, in order
+
+        Raises:
+            ValueError: If usernames and passwords differ in length
+        """
+        if usernames is None:
+            usernames = repeat(None)
+        elif len(usernames) != len(passwords):
+            raise ValueError("usernames must have one entry per password")
+
+        validate = self.validate
+        return [validate(password, username, fast_fail) for password, username in zip(passwords, usernames)]
+
+    def _has_sequential_chars(self, password: str, threshold: int = 4, already_lowered: bool = False) -> bool:
         """
         Check if password contains sequential characters
 
         Args:
             password: Password to check
             threshold: Length of sequential characters to trigger (default: 4)
+            already_lowered: Password is already lower-cased (skips another lower())
 
         Returns:
             True if sequential characters found
         """
-        # Check for numeric sequences
-        for i in range(len(password) - threshold + 1):
-            substr = password[i:i + threshold]
-            if substr.isdigit():
-                chars = [int(c) for c in substr]
-                # Check ascending
-                if all(chars[j] == chars[j-1] + 1 for j in range(1, len(chars))):
-                    return True
-                # Check descending
-                if all(chars[j] == chars[j-1] - 1 for j in range(1, len(chars))):
-                    return True
-
-        # Check for alphabetic sequences
-        for i in range(len(password) - threshold + 1):
-            substr = password[i:i + threshold].lower()
-            if substr.isalpha():
-                chars = [ord(c) for c in substr]
-                # Check ascending
-                if all(chars[j] == chars[j-1] + 1 for j in range(1, len(chars))):
-                    return True
-                # Check descending
-                if all(chars[j] == chars[j-1] - 1 for j in range(1, len(chars))):
-                    return True
+        # ASCII passwords (the common case) scan table-translated bytes: no per-character method calls
+        if password.isascii():
+            data = password.encode()
+            # A sequence needs `threshold` consecutive digits or letters; most passwords
+            # have no such run, so rule that out with two C-level substring searches first
+            runs = data.translate(_RUN_CLASS)
+            if b'0' * threshold not in runs and b'a' * threshold not in runs:
+                return False
+            return _has_ascii_sequence(data.translate(_SEQUENCE_KEY), threshold)
+
+        # Single pass tracking the current ascending and descending run lengths;
+        # a run only continues between two digits (by value) or two letters (by code point)
+        run_up = run_down = 0
+        prev_kind = prev_value = None
+        for c in (password if already_lowered else password.lower()):
+            if c.isdigit():
+                kind, value = 'digit', unicodedata.digit(c)
+            elif c.isalpha():
+                kind, value = 'alpha', ord(c)
+            else:
+                prev_kind = None
+                continue
+
+            if kind == prev_kind:
+                step = value - prev_value
+                run_up = run_up + 1 if step == 1 else 1
+                run_down = run_down + 1 if step == -1 else 1
+            else:
+                run_up = run_down = 1
+
+            if run_up >= threshold or run_down >= threshold:
+                return True
+
+            prev_kind, prev_value = kind, value
 
         return False
 
@@ -145,9 +314,14 @@ class PasswordValidator:
         Returns:
             True if repeated characters found
         """
-        for i in range(len(password) - threshold + 1):
-            if len(set(password[i:i + threshold])) == 1:
+        # Single pass counting the current run of identical characters
+        run = 0
+        prev = None
+        for c in password:
+            run = run + 1 if c == prev else 1
+            if run >= threshold:
                 return True
+            prev = c
         return False
 
     def generate_requirements_text(self) -> str:
@@ -187,15 +361,16 @@ default_validator = PasswordValidator(
 )
 
 
-def validate_password_strength(password: str, username: str = None) -> Tuple[bool, str]:
+def validate_password_strength(password: str, username: str = None, fast_fail: bool = False) -> Tuple[bool, str]:
     """
     Convenience function to validate password using default validator
 
     Args:
         password: Password to validate
         username: Optional username to check similarity
+        fast_fail: Stop at the first failure (see PasswordValidator.validate)
 
     Returns:
         Tuple of (is_valid, error_message)
     """
-    return default_validator.validate(password, username)
+    return default_validator.validate(password, username, fast_fail)
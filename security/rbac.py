@@ -3,11 +3,15 @@ Role-Based Access Control (RBAC)
 Permission management and authorization checks
 """
 from enum import Enum
-from typing import Set, Dict
+from functools import lru_cache
+from typing import FrozenSet, Set, Dict, Tuple
 from database.models import UserRole, User
 from fastapi import HTTPException
 import logging
 
+# Enum members are singletons, so role checks below compare identity against this
+_ADMIN = UserRole.ADMIN
+
 class Permission(Enum):
     """System permissions"""
     # Infrastructure operations
@@ -72,7 +76,24 @@ ROLE_PERMISSIONS: Dict[UserRole, Set[Permission]] = {
     }
 }
 
-def get_role_permissions(role: UserRole) -> Set[Permission]:
+# Immutable snapshot of ROLE_PERMISSIONS handed out by get_role_permissions
+_ROLE_PERMISSIONS_FROZEN: Dict[UserRole, FrozenSet[Permission]] = {
+    role: frozenset(perms) for role, perms in ROLE_PERMISSIONS.items()
+}
+
+# One bit per permission and the OR of those bits per role, for has_permission
+_PERMISSION_BIT: Dict[Permission, int] = {perm: 1 << i for i, perm in enumerate(Permission)}
+_ROLE_PERMISSION_MASK: Dict[UserRole, int] = {
+    role: sum(_PERMISSION_BIT[perm] for perm in perms) for role, perms in ROLE_PERMISSIONS.items()
+}
+
+# Each role's permissions in Permission declaration order, for stable listings
+_ROLE_PERMISSION_LIST: Dict[UserRole, Tuple[Permission, ...]] = {
+    role: tuple(perm for perm in Permission if perm in perms) for role, perms in ROLE_PERMISSIONS.items()
+}
+
+@lru_cache(maxsize=None)
+def get_role_permissions(role: UserRole) -> FrozenSet[Permission]:
     """
     Get all permissions for a given role
 
@@ -80,9 +101,21 @@ def get_role_permissions(role: UserRole) -> Set[Permission]:
         role: User role
 
     Returns:
-        Set of permissions
+        Frozen set of permissions (cached per role)
+    """
+    return _ROLE_PERMISSIONS_FROZEN.get(role, frozenset())
+
+def is_admin(user: User) -> bool:
     """
-    return ROLE_PERMISSIONS.get(role, set())
+    Check if a user has the admin role
+
+    Args:
+        user: User object
+
+    Returns:
+        True if user is an admin
+    """
+    return user.role is _ADMIN
 
 def has_permission(user: User, permission: Permission) -> bool:
     """
@@ -98,8 +131,11 @@ def has_permission(user: User, permission: Permission) -> bool:
     if not user.is_active:
         return False
 
-    role_perms = get_role_permissions(user.role)
-    return permission in role_perms
+    # Admins hold every permission
+    if user.role is _ADMIN:
+        return True
+
+    return bool(_ROLE_PERMISSION_MASK.get(user.role, 0) & _PERMISSION_BIT[permission])
 
 def require_permission(permission: Permission):
     """
@@ -120,8 +156,8 @@ def require_permission(permission: Permission):
     def permission_checker(user: User) -> User:
         if not has_permission(user, permission):
             logging.warning(
-                f"User {user.id} ({user.username}) attempted to access "
-                f"{permission.value} without permission"
+                "User %s (%s) attempted to access %s without permission",
+                user.id, user.username, permission.value
             )
             raise HTTPException(
                 status_code=403,
@@ -144,7 +180,8 @@ def check_permission(user: User, permission: Permission) -> None:
     """
     if not has_permission(user, permission):
         logging.warning(
-            f"User {user.id} ({user.username}) denied access to {permission.value}"
+            "User %s (%s) denied access to %s",
+            user.id, user.username, permission.value
         )
         raise HTTPException(
             status_code=403,
@@ -162,13 +199,13 @@ def check_resource_ownership(user: User, resource_user_id: str) -> None:
     Raises:
         HTTPException: If user doesn't own resource and is not admin
     """
-    if user.role == UserRole.ADMIN:
+    if is_admin(user):
         return  # Admins can access all resources
 
     if user.id != resource_user_id:
         logging.warning(
-            f"User {user.id} ({user.username}) attempted to access "
-            f"resource owned by user {resource_user_id}"
+            "User %s (%s) attempted to access resource owned by user %s",
+            user.id, user.username, resource_user_id
         )
         raise HTTPException(
             status_code=403,
@@ -192,7 +229,7 @@ def can_modify_user(current_user: User, target_user: User) -> bool:
         True if modification is allowed
     """
     # Admins can modify anyone
-    if current_user.role == UserRole.ADMIN:
+    if is_admin(current_user):
         return True
 
     # Users can only modify themselves
@@ -210,10 +247,10 @@ def get_accessible_user_ids(current_user: User, all_user_ids: list) -> list:
         all_user_ids: List of all user IDs
 
     Returns:
-        List of accessible user IDs
+        List of accessible user IDs (for admins, all_user_ids itself rather than a copy)
     """
     # Admins can see all users
-    if current_user.role == UserRole.ADMIN:
+    if is_admin(current_user):
         return all_user_ids
 
     # Regular users can only see themselves
@@ -231,7 +268,7 @@ def validate_role_change(current_user: User, new_role: UserRole) -> None:
         HTTPException: If role change is not allowed
     """
     # Only admins can change roles
-    if current_user.role != UserRole.ADMIN:
+    if not is_admin(current_user):
         raise HTTPException(
             status_code=403,
             detail="Only administrators can change user roles"
@@ -239,7 +276,25 @@ def validate_role_change(current_user: User, new_role: UserRole) -> None:
 
     # Prevent demoting the last admin
     # (This would need additional database query in practice)
-    logging.info(f"Role change validated: {current_user.username} -> {new_role.value}")
+    logging.info("Role change validated: %s -> %s", current_user.username, new_role.value)
+
+# Human-readable permission descriptions, built once at import
+_PERMISSION_DESCRIPTIONS: Dict[Permission, str] = {
+    Permission.CREATE_INFRASTRUCTURE: "Create new infrastructure resources",
+    Permission.MODIFY_INFRASTRUCTURE: "Modify existing infrastructure",
+    Permission.DESTROY_INFRASTRUCTURE: "Destroy infrastructure resources",
+    Permission.VIEW_INFRASTRUCTURE: "View infrastructure resources",
+    Permission.MANAGE_CREDENTIALS: "Add, modify, or delete cloud credentials",
+    Permission.VIEW_CREDENTIALS: "View credential metadata",
+    Permission.CREATE_USER: "Create new user accounts",
+    Permission.MODIFY_USER: "Modify user accounts",
+    Permission.DELETE_USER: "Delete user accounts",
+    Permission.VIEW_USERS: "View user information",
+    Permission.VIEW_AUDIT_LOGS: "View system audit logs",
+    Permission.VIEW_COST_REPORTS: "View cost reports and estimates",
+    Permission.MANAGE_SYSTEM_CONFIG: "Manage system configuration",
+    Permission.VIEW_SYSTEM_STATUS: "View system health and status",
+}
 
 def get_permission_description(permission: Permission) -> str:
     """
@@ -251,24 +306,14 @@ def get_permission_description(permission: Permission) -> str:
     Returns:
         Description string
     """
-    descriptions = {
-        Permission.CREATE_INFRASTRUCTURE: "Create new infrastructure resources",
-        Permission.MODIFY_INFRASTRUCTURE: "Modify existing infrastructure",
-        Permission.DESTROY_INFRASTRUCTURE: "Destroy infrastructure resources",
-        Permission.VIEW_INFRASTRUCTURE: "View infrastructure resources",
-        Permission.MANAGE_CREDENTIALS: "Add, modify, or delete cloud credentials",
-        Permission.VIEW_CREDENTIALS: "View credential metadata",
-        Permission.CREATE_USER: "Create new user accounts",
-        Permission.MODIFY_USER: "Modify user accounts",
-        Permission.DELETE_USER: "Delete user accounts",
-        Permission.VIEW_USERS: "View user information",
-        Permission.VIEW_AUDIT_LOGS: "View system audit logs",
-        Permission.VIEW_COST_REPORTS: "View cost reports and estimates",
-        Permission.MANAGE_SYSTEM_CONFIG: "Manage system configuration",
-        Permission.VIEW_SYSTEM_STATUS: "View system health and status",
-    }
+    return _PERMISSION_DESCRIPTIONS.get(permission, permission.value)
 
-    return descriptions.get(permission, permission.value)
+# Human-readable role descriptions, built once at import
+_ROLE_DESCRIPTIONS: Dict[UserRole, str] = {
+    UserRole.VIEWER: "Read-only access to infrastructure and reports",
+    UserRole.USER: "Can create, modify, and manage their own infrastructure",
+    UserRole.ADMIN: "Full system access including user and system management",
+}
 
 def get_role_description(role: UserRole) -> str:
     """
@@ -280,13 +325,7 @@ def get_role_description(role: UserRole) -> str:
     Returns:
         Description string
     """
-    descriptions = {
-        UserRole.VIEWER: "Read-only access to infrastructure and reports",
-        UserRole.USER: "Can create, modify, and manage their own infrastructure",
-        UserRole.ADMIN: "Full system access including user and system management",
-    }
-
-    return descriptions.get(role, role.value)
+    return _ROLE_DESCRIPTIONS.get(role, role.value)
 
 def list_role_permissions(role: UserRole) -> list:
     """
@@ -296,14 +335,12 @@ def list_role_permissions(role: UserRole) -> list:
         role: User role
 
     Returns:
-        List of dicts with permission name and description
+        List of dicts with permission name and description, in a stable order
     """
-    permissions = get_role_permissions(role)
-
     return [
         {
             "permission": perm.value,
-            "description": get_permission_description(perm)
+            "description": _PERMISSION_DESCRIPTIONS.get(perm, perm.value)
         }
-        for perm in permissions
+        for perm in _ROLE_PERMISSION_LIST.get(role, ())
     ]